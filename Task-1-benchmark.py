@@ -0,0 +1,279 @@
+"""Benchmark suite for the Task-1 to-do manager
+
+Generates synthetic task files of several sizes, times the main TodoApp
+operations with their prompts stubbed out, records peak memory and writes
+the results as JSON so runs can be compared between versions:
+
+    python Task-1-benchmark.py --sizes 10k,100k --output before.json
+    python Task-1-benchmark.py --sizes 10k,100k --compare before.json
+"""
+
+import argparse
+import builtins
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = "10k,100k,1M"
+# A timing this much slower than the baseline counts as a regression
+DEFAULT_THRESHOLD = 1.25
+# ...and at least this many seconds slower, so timer noise on tiny operations is ignored
+MIN_REGRESSION_SECONDS = 0.005
+LOOKUPS = 10000
+
+WORDS = ['release', 'review', 'deploy', 'fix', 'bug', 'docs', 'meeting', 'report',
+         'invoice', 'backup', 'update', 'plan', 'design', 'test', 'refactor', 'email']
+
+
+# The command-line entry point, which cli_add starts like a user would
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Task-1.py")
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith('k'):
+        value, multiplier = value[:-1], 1000
+    elif value.endswith('m'):
+        value, multiplier = value[:-1], 1000000
+    try:
+        return int(float(value) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: '{value}' (use e.g. 10k or 1M)")
+
+
+def synthetic_records(count: int, seed: int) -> Iterator[Dict]:
+    """Deterministic task records with a realistic mix of fields"""
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.now()
+    for task_id in range(1, count + 1):
+        completed = rng.random() < 0.4
+        created = now - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+        due_date = None
+        if rng.random() < 0.6:
+            due_date = (today + timedelta(days=rng.randint(-60, 60))).isoformat()
+        yield {
+            'id': task_id,
+            'title': f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} #{task_id}",
+            'description': " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 8))),
+            'priority': rng.choice(('low', 'medium', 'medium', 'high')),
+            'due_date': due_date,
+            'completed': completed,
+            'created_date': created.strftime('%Y-%m-%d %H:%M:%S'),
+            'completed_date': (created + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S') if completed else None,
+        }
+
+
+def generate_task_file(todo, path: str, backend: str, count: int, seed: int):
+    if backend == 'sqlite':
+        store = todo.SqliteTaskStore(path)
+        batch = []
+        for record in synthetic_records(count, seed):
+            batch.append(todo.Task.from_dict(record))
+            if len(batch) >= todo.IMPORT_BATCH_SIZE:
+                store.put_many(batch)
+                batch = []
+        store.put_many(batch)
+        store.close()
+    else:
+        app = todo.TodoApp(path, backend, autoload=False)
+        if not app.write_snapshot(synthetic_records(count, seed)):
+            raise RuntimeError(f"could not write {path}")
+
+
+@contextmanager
+def quiet():
+    # Prompts return immediately and listings go nowhere
+    original_input = builtins.input
+    builtins.input = lambda prompt="": ""
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            yield
+    finally:
+        builtins.input = original_input
+
+
+def measure(operation: Callable[[], None], repeat: int, memory: bool) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        with quiet():
+            started = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - started)
+    result = {'seconds': min(timings), 'runs': timings}
+    if memory:
+        # A separate traced run, so tracing overhead never shows up in the timings
+        tracemalloc.start()
+        try:
+            with quiet():
+                operation()
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def benchmark_size(todo, workdir: str, backend: str, count: int, args) -> List[Dict]:
+    extension = {'json': '.json', 'sqlite': '.db', 'binary': '.tdb'}[backend]
+    path = os.path.join(workdir, f"tasks-{count}{extension}")
+    started = time.perf_counter()
+    generate_task_file(todo, path, backend, count, args.seed)
+    print(f"⏳ {backend} {count:,} tasks: generated in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    app = todo.TodoApp(path, backend, autoload=False)
+    rng = random.Random(args.seed)
+    lookup_ids = [rng.randint(1, count) for _ in range(LOOKUPS)]
+    export_file = os.path.join(workdir, f"export-{count}.ndjson")
+
+    def find_tasks():
+        for task_id in lookup_ids:
+            app.find_task_by_id(task_id)
+
+    operations = [
+        ('load_tasks', app.load_tasks),
+        ('find_task_by_id', find_tasks),
+    ]
+    for filter_type in ('all', 'pending', 'completed', 'overdue', 'today', 'upcoming'):
+        operations.append((f'list_tasks[{filter_type}]', lambda f=filter_type: app.list_tasks(f)))
+        operations.append((f'list_tasks[{filter_type}]:page',
+                           lambda f=filter_type: app.list_tasks(f, limit=todo.DEFAULT_PAGE_SIZE)))
+    operations += [
+        ('search_tasks', lambda: app.search_tasks("release plan")),
+        ('query_tasks', lambda: app.query_tasks('priority:high -completed "deploy"')),
+        ('show_statistics', app.show_statistics),
+        ('export_tasks[ndjson]', lambda: app.export_tasks(export_file, "ndjson")),
+        ('save_tasks', app.save_tasks),
+        # A fresh interpreter, as a user typing --add would start one
+        ('cli_add', lambda: subprocess.run([sys.executable, SCRIPT, '--no-daemon', '--file', path,
+                                            '--add', 'Benchmark task'], stdout=subprocess.DEVNULL, check=True)),
+    ]
+
+    results = []
+    for name, operation in operations:
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        # Everything after the load works on the loaded list
+        if name != 'load_tasks' and app.partial:
+            with quiet():
+                app.load_tasks()
+        result = measure(operation, args.repeat, not args.no_memory)
+        if name == 'find_task_by_id':
+            result['per_call_seconds'] = result['seconds'] / LOOKUPS
+        result.update(backend=backend, size=count, operation=name)
+        results.append(result)
+        print(f"   {name:<32} {result['seconds'] * 1000:>10.1f} ms"
+              + (f" {result['peak_bytes'] / 1048576:>9.1f} MB" if 'peak_bytes' in result else ""),
+              file=sys.stderr)
+
+    if app._compaction_thread:
+        app._compaction_thread.join()
+    if isinstance(app.tasks, todo.SqliteTaskStore):
+        app.tasks.close()
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline_file: str, threshold: float) -> int:
+    """Print timings against a baseline run; returns the number of regressions"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {(r['backend'], r['size'], r['operation']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    print(f"\n{'backend':<8} {'size':>9} {'operation':<32} {'before':>10} {'after':>10} {'ratio':>7}",
+          file=sys.stderr)
+    for result in results:
+        before = baseline.get((result['backend'], result['size'], result['operation']))
+        if before is None:
+            continue
+        ratio = result['seconds'] / max(before['seconds'], 1e-9)
+        flag = ""
+        if ratio > threshold and result['seconds'] - before['seconds'] >= MIN_REGRESSION_SECONDS:
+            regressions += 1
+            flag = " ⚠️"
+        print(f"{result['backend']:<8} {result['size']:>9,} {result['operation']:<32} "
+              f"{before['seconds'] * 1000:>8.1f}ms {result['seconds'] * 1000:>8.1f}ms {ratio:>6.2f}x{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='📊 Benchmark the To-Do List Manager')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                       help=f'Comma separated task counts (default: {DEFAULT_SIZES})')
+    parser.add_argument('--backend', action='append', choices=['json', 'sqlite', 'binary'],
+                       help='Storage backend to benchmark; repeat for several (default: json)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per operation, the fastest is kept')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the synthetic tasks')
+    parser.add_argument('--only', action='append', metavar='OPERATION',
+                       help='Only run operations starting with this name; repeatable')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the peak memory runs')
+    parser.add_argument('--output', '-o', metavar='FILE', help='Write JSON results to FILE (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against an earlier JSON result file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f'Slowdown ratio reported as a regression (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--workdir', help='Keep generated files here instead of a temporary directory')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    import todo_list as todo
+    workdir = args.workdir or tempfile.mkdtemp(prefix="todo-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    try:
+        for backend in args.backend or ['json']:
+            for count in sizes:
+                results.extend(benchmark_size(todo, workdir, backend, count, args))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to '{args.output}'", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {regressions} operation(s) slower than {args.threshold:.2f}x the baseline", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ No regressions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def task_file(tmp_path) -> str:
+    return str(tmp_path / "tasks.json")
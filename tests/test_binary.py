@@ -0,0 +1,46 @@
+from todo_list import BinaryTaskFile, TodoApp, write_binary_tasks
+
+RECORDS = [
+    {'id': 1, 'title': "plain", 'description': "", 'priority': 'medium', 'due_date': None,
+     'completed': False, 'created_date': "2024-01-02 03:04:05", 'completed_date': None},
+    {'id': 7, 'title': "ünïcode ✓", 'description': "two\nlines", 'priority': 'high',
+     'due_date': "2024-02-29", 'completed': True, 'created_date': "2024-01-03 00:00:00",
+     'completed_date': "2024-01-04 12:30:00"},
+]
+
+
+def comparable(record: dict) -> dict:
+    return {field: record.get(field) for field in RECORDS[0]}
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "tasks.tdb")
+    assert write_binary_tasks(path, RECORDS) == 2
+    with BinaryTaskFile(path) as binary:
+        assert len(binary) == 2
+        decoded = [binary.decode(fields) for fields in binary.iter_fixed()]
+    assert [comparable(record) for record in decoded] == RECORDS
+
+
+def test_convert_round_trip(tmp_path, task_file):
+    app = TodoApp(task_file)
+    app.quick_add("one")
+    app.quick_add("two")
+    with app.batch():
+        app.delete_tasks([1])
+    app.set_completion([2])
+    binary_file, json_file = str(tmp_path / "tasks.tdb"), str(tmp_path / "back.json")
+    assert TodoApp(task_file).convert_tasks(binary_file) == 1
+    assert TodoApp(binary_file).convert_tasks(json_file) == 1
+    original = [task.to_dict() for task in TodoApp(task_file).tasks]
+    assert [task.to_dict() for task in TodoApp(binary_file).tasks] == original
+    assert [task.to_dict() for task in TodoApp(json_file).tasks] == original
+
+
+def test_binary_file_takes_journaled_changes(tmp_path):
+    binary_file = str(tmp_path / "tasks.tdb")
+    app = TodoApp(binary_file)
+    app.quick_add("one")
+    app.save_tasks()
+    TodoApp(binary_file, autoload=False).quick_add("two")
+    assert [task.title for task in TodoApp(binary_file).tasks] == ["one", "two"]
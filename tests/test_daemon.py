@@ -0,0 +1,26 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Task-1.py")
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGTERM') or sys.platform == 'win32', reason="needs Unix domain sockets")
+def test_sigterm_removes_socket(task_file):
+    socket_path = task_file + ".sock"
+    daemon = subprocess.Popen([sys.executable, SCRIPT, '--file', task_file, '--serve'], stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_path):
+            assert daemon.poll() is None and time.monotonic() < deadline
+            time.sleep(0.05)
+        daemon.send_signal(signal.SIGTERM)
+        assert daemon.wait(timeout=10) == 0
+    finally:
+        if daemon.poll() is None:
+            daemon.kill()
+    assert not os.path.exists(socket_path)
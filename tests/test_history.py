@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+
+from todo_list import Task, TodoApp
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Task-1.py")
+
+
+def titles(task_file: str):
+    return [task.title for task in sorted(TodoApp(task_file).tasks, key=lambda task: task.id)]
+
+
+def add_in_batch(app: TodoApp, title: str):
+    with app.batch():
+        task = Task(app.next_id, title)
+        app.tasks.put(task)
+        app.next_id += 1
+        app.record_change('put', task)
+
+
+def test_undo_and_redo(task_file):
+    app = TodoApp(task_file)
+    add_in_batch(app, "one")
+    add_in_batch(app, "two")
+    with app.batch():
+        app.delete_tasks([1])
+    assert titles(task_file) == ["two"]
+    assert app.undo(2) == 2
+    assert titles(task_file) == ["one"]
+    assert app.undo(1, redo=True) == 1
+    assert titles(task_file) == ["one", "two"]
+
+
+def test_undo_reverts_renumbered_task_only(task_file):
+    TodoApp(task_file, autoload=False).quick_add("first")
+    app = TodoApp(task_file)
+    TodoApp(task_file, autoload=False).quick_add("from B")
+    add_in_batch(app, "from A")
+    assert titles(task_file) == ["first", "from B", "from A"]
+    assert app.undo() == 1
+    assert titles(task_file) == ["first", "from B"]
+    assert app.undo(1, redo=True) == 1
+    assert titles(task_file) == ["first", "from B", "from A"]
+
+
+def test_undo_after_deferred_write_is_renumbered(task_file):
+    app = TodoApp(task_file)
+    app.start_background_writer()
+    try:
+        add_in_batch(app, "from A")
+        with app.batch():
+            app.set_completion([1])
+        TodoApp(task_file, autoload=False).quick_add("from B")
+        app.flush_changes()
+        assert titles(task_file) == ["from B", "from A"]
+        assert app.undo(2) == 2
+    finally:
+        app.stop_background_writer()
+    assert titles(task_file) == ["from B"]
+
+
+def test_undo_of_task_created_and_deleted_before_writing(task_file):
+    app = TodoApp(task_file)
+    app.start_background_writer()
+    try:
+        add_in_batch(app, "short-lived")
+        with app.batch():
+            app.delete_tasks([1])
+        TodoApp(task_file, autoload=False).quick_add("from B")
+    finally:
+        app.stop_background_writer()
+    app.load_tasks()
+    assert app.undo() == 1
+    # Restored under an id of its own rather than over the other process's task
+    assert titles(task_file) == ["from B", "short-lived"]
+
+
+def test_concurrent_adds_get_distinct_ids(task_file):
+    app = TodoApp(task_file)
+    add_in_batch(app, "first")
+    processes = [subprocess.Popen([sys.executable, SCRIPT, '--no-daemon', '--file', task_file, '--add', f"cli {n}"],
+                                  stdout=subprocess.DEVNULL) for n in range(8)]
+    assert all(process.wait() == 0 for process in processes)
+    add_in_batch(app, "last")
+    tasks = sorted(TodoApp(task_file).tasks, key=lambda task: task.id)
+    assert [task.id for task in tasks] == list(range(1, 11))
+    assert sorted(task.title for task in tasks[1:9]) == [f"cli {n}" for n in range(8)]
+    assert tasks[-1].title == "last"
+    assert app.undo() == 1
+    assert len(titles(task_file)) == 9 and "last" not in titles(task_file)
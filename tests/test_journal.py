@@ -0,0 +1,44 @@
+from todo_list import TodoApp
+
+
+def titles(task_file: str):
+    return [task.title for task in sorted(TodoApp(task_file).tasks, key=lambda task: task.id)]
+
+
+def test_replay_applies_journal_over_snapshot(task_file):
+    app = TodoApp(task_file)
+    app.quick_add("one")
+    app.quick_add("two")
+    app.save_tasks()
+    app.quick_add("three")
+    with app.batch():
+        app.delete_tasks([1])
+    assert titles(task_file) == ["two", "three"]
+
+
+def test_append_after_torn_tail_keeps_new_tasks(task_file):
+    TodoApp(task_file, autoload=False).quick_add("one")
+    with open(task_file + ".journal", 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "task": {"id": 2, "tit')
+    # A full pass over the files, as any listing makes, must not adopt the torn record
+    assert titles(task_file) == ["one"]
+    TodoApp(task_file, autoload=False).quick_add("two")
+    TodoApp(task_file, autoload=False).quick_add("three")
+    assert titles(task_file) == ["one", "two", "three"]
+
+
+def test_replay_skips_unreadable_lines(task_file, capsys):
+    TodoApp(task_file, autoload=False).quick_add("one")
+    with open(task_file + ".journal", 'a', encoding='utf-8') as f:
+        f.write('not json\n')
+        f.write('{"op": "put", "task": {"id": 2, "title": "after"}}\n')
+    assert titles(task_file) == ["one", "after"]
+    assert "Skipping unreadable line 2" in capsys.readouterr().out
+
+
+def test_replay_recovers_entry_glued_onto_torn_record(task_file):
+    TodoApp(task_file, autoload=False).quick_add("one")
+    with open(task_file + ".journal", 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "task": {"id": 2, "tit'
+                '{"op": "put", "task": {"id": 2, "title": "glued"}}\n')
+    assert titles(task_file) == ["one", "glued"]
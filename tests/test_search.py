@@ -0,0 +1,35 @@
+import os
+
+import todo_list
+from todo_list import Task, TodoApp, TrigramIndex
+
+
+def test_overlays_are_folded_at_threshold(monkeypatch):
+    monkeypatch.setattr(todo_list, 'SEARCH_INDEX_OVERLAY_TASKS', 3)
+    index = TrigramIndex.build([Task(1, "release notes")])
+    for task_id in range(2, 7):
+        index.add(Task(task_id, f"release {task_id}"))
+    assert len(index.added_ids) < 3
+    for task_id in (1, 2, 3):
+        index.discard(Task(task_id, "release"))
+    assert len(index.removed) < 3
+    assert index.candidates(["release"]) == {4, 5, 6}
+
+
+def test_index_is_only_saved_when_asked_for(task_file):
+    app = TodoApp(task_file)
+    with app.batch():
+        for title in ("write release notes", "fix bug"):
+            task = Task(app.next_id, title)
+            app.tasks.put(task)
+            app.next_id += 1
+            app.record_change('put', task)
+    app.tasks.search("release")
+    app.save_search_index()
+    assert not os.path.exists(app.index_file)
+    
+    app.save_index = True
+    app.save_search_index()
+    reloaded = TodoApp(task_file)
+    assert [task.title for task in reloaded.tasks.search("release")] == ["write release notes"]
+    assert reloaded.tasks.text_index is not None and not reloaded.tasks.text_index.dirty
@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+
+from todo_list import TodoApp
+
+
+def test_migrate_is_one_undoable_step(tmp_path, task_file):
+    source = TodoApp(task_file)
+    source.quick_add("one")
+    source.quick_add("two")
+    database = str(tmp_path / "tasks.db")
+    app = TodoApp(database)
+    assert app.migrate_from_json(task_file) == 2
+    assert sorted(task.title for task in TodoApp(database).tasks) == ["one", "two"]
+    assert app.undo() == 1
+    assert len(TodoApp(database).tasks) == 0
+
+
+def test_migrate_refuses_a_file_with_tasks(tmp_path, task_file):
+    TodoApp(task_file).quick_add("from json")
+    database = str(tmp_path / "tasks.db")
+    app = TodoApp(database)
+    app.quick_add("already here")
+    assert app.migrate_from_json(task_file) is None
+    assert [task.title for task in TodoApp(database).tasks] == ["already here"]
+
+
+def test_broken_database_raises(tmp_path):
+    database = tmp_path / "broken.db"
+    database.write_text("not a database")
+    with pytest.raises(sqlite3.Error):
+        TodoApp(str(database))
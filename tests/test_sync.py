@@ -0,0 +1,75 @@
+import pytest
+
+from todo_list import TodoApp
+
+
+def tasks_by_title(task_file: str):
+    return {task.title: task for task in TodoApp(task_file).tasks}
+
+
+@pytest.fixture
+def synced(tmp_path):
+    """Two files sharing a baseline with tasks 'one' and 'two'"""
+    here, there = str(tmp_path / "here.json"), str(tmp_path / "there.json")
+    TodoApp(here).quick_add("one")
+    TodoApp(here).quick_add("two")
+    TodoApp(there)
+    assert TodoApp(here).sync_tasks(there)['pushed'] == 2
+    return here, there
+
+
+def test_first_sync_renumbers_tasks_sharing_an_id(tmp_path):
+    here, there = str(tmp_path / "here.json"), str(tmp_path / "there.json")
+    TodoApp(here).quick_add("mine")
+    TodoApp(there).quick_add("theirs")
+    summary = TodoApp(here).sync_tasks(there)
+    assert summary['renumbered'] == 1
+    for task_file in (here, there):
+        assert sorted((task.id, task.title) for task in TodoApp(task_file).tasks) in (
+            [(1, "mine"), (2, "theirs")], [(1, "theirs"), (2, "mine")])
+    assert tasks_by_title(here).keys() == tasks_by_title(there).keys()
+
+
+def test_first_sync_merges_the_same_task(tmp_path):
+    here, there = str(tmp_path / "here.json"), str(tmp_path / "there.json")
+    TodoApp(here).quick_add("shared")
+    TodoApp(there).import_tasks(here, 'json')
+    summary = TodoApp(here).sync_tasks(there)
+    assert summary['renumbered'] == 0
+    assert len(TodoApp(there).tasks) == 1
+
+
+def test_delete_spreads_once_there_is_a_baseline(synced):
+    here, there = synced
+    TodoApp(here).delete_tasks([1])
+    TodoApp(here).sync_tasks(there)
+    assert set(tasks_by_title(there)) == {"two"}
+
+
+def test_edit_beats_delete(synced):
+    here, there = synced
+    TodoApp(here).delete_tasks([1])
+    TodoApp(there).set_completion([1])
+    summary = TodoApp(here).sync_tasks(there)
+    assert summary['conflicts'] == 1
+    assert tasks_by_title(here)["one"].completed
+    assert tasks_by_title(there)["one"].completed
+
+
+def test_higher_revision_wins_a_conflict(synced):
+    here, there = synced
+    app = TodoApp(here)
+    app.set_priority([app.find_task_by_id(2)], 'high')
+    app.set_priority([app.find_task_by_id(2)], 'low')
+    other = TodoApp(there)
+    other.set_priority([other.find_task_by_id(2)], 'high')
+    summary = TodoApp(there).sync_tasks(here)
+    assert summary['conflicts'] == 1
+    assert tasks_by_title(here)["two"].priority == 'low'
+    assert tasks_by_title(there)["two"].priority == 'low'
+
+
+def test_sync_without_changes_copies_nothing(synced):
+    here, there = synced
+    summary = TodoApp(there).sync_tasks(here)
+    assert summary['pulled'] == summary['pushed'] == 0
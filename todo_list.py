@@ -0,0 +1,4589 @@
+import functools
+import io
+import json
+import marshal
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from datetime import datetime, date, timedelta
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
+import bisect
+import heapq
+# argparse, csv, gzip, mmap, socket, sqlite3 and tempfile are imported where
+# they are used, so one-shot commands such as --add do not pay for them at startup
+
+try:
+    import fcntl
+except ImportError:
+    # Advisory file locks are POSIX-only; elsewhere only threads are serialized
+    fcntl = None
+
+# Once the append-only journal grows past this size it is folded back into
+# the snapshot file by a background compaction.
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# Interactive edits are written once no change has been made for this long
+SAVE_DELAY_SECONDS = 1.0
+
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+# Priority names indexed by Task.priority_rank; unknown names found in a task
+# file are appended so they round-trip unchanged.
+PRIORITY_NAMES = ['high', 'medium', 'low']
+
+# Sort key used for tasks without a due date, after every real due date
+NO_DUE_ORDINAL = date.max.toordinal() + 1
+
+# Bit layout of TaskStore display keys: completed | priority rank | due ordinal | id,
+# 64 bits in all so the keys fit an unsigned array
+DISPLAY_ID_BITS = 39
+DISPLAY_DUE_BITS = 22
+DISPLAY_ID_MASK = (1 << DISPLAY_ID_BITS) - 1
+DISPLAY_RANK_KEY = 1 << (DISPLAY_DUE_BITS + DISPLAY_ID_BITS)
+DISPLAY_COMPLETED_KEY = 4 * DISPLAY_RANK_KEY
+
+DEFAULT_PAGE_SIZE = 20
+
+# Task files at least this large report progress while loading
+LOAD_PROGRESS_BYTES = 64 * 1024 * 1024
+LOAD_CHUNK_CHARS = 1024 * 1024
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Imported rows are committed in batches of this size
+IMPORT_BATCH_SIZE = 10000
+SNAPSHOT_WRITE_BATCH = 1000
+
+# Exports are encoded and written once this many characters are buffered
+EXPORT_BUFFER_CHARS = 1024 * 1024
+EXPORT_FORMATS = {'text': '.txt', 'ndjson': '.ndjson', 'csv': '.csv'}
+TASK_FIELDS = ('id', 'title', 'description', 'priority', 'due_date',
+               'completed', 'created_date', 'completed_date', 'revision', 'modified_date')
+EXPORT_COLUMNS = TASK_FIELDS
+
+SYNC_STATE_VERSION = 1
+
+# Listings are formatted into a buffer and written once this many characters are queued
+RENDER_BUFFER_CHARS = 64 * 1024
+OUTPUT_FORMATS = ('pretty', 'table', 'plain', 'json', 'ndjson')
+
+
+def iter_json_array(path: str, on_progress: Optional[Callable[[int], None]] = None) -> Iterator:
+    # Yields the elements of a top-level JSON array one at a time, so only the
+    # current chunk of the file is held in memory.
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, pos, chars_read, eof = '', 0, 0, False
+        state = 'start'
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) and state in ('first', 'value'):
+                if state == 'first' and buffer[pos] == ']':
+                    return
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    end = None
+                # A value running up to the end of the buffer may be truncated
+                if end is not None and (end < len(buffer) or eof):
+                    yield value
+                    pos, state = end, 'separator'
+                    continue
+            elif pos < len(buffer):
+                char = buffer[pos]
+                if state == 'start' and char == '[':
+                    pos, state = pos + 1, 'first'
+                    continue
+                if state == 'separator' and char in ',]':
+                    if char == ']':
+                        return
+                    pos, state = pos + 1, 'value'
+                    continue
+                raise json.JSONDecodeError("Malformed task array", buffer, pos)
+            elif eof:
+                raise json.JSONDecodeError("Unexpected end of task file", buffer, pos)
+            
+            chunk = f.read(LOAD_CHUNK_CHARS)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            chars_read += len(chunk)
+            if on_progress and chunk:
+                on_progress(chars_read)
+
+
+def complete_lines_size(path: str, size: int) -> int:
+    """Length of the first size bytes of path up to the end of their last full line
+    
+    A crash mid-append can leave a torn journal record without its newline;
+    the next append truncates the journal back to this length.
+    """
+    end = size
+    with open(path, 'rb') as f:
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+def parse_journal_line(line: str) -> Optional[Dict]:
+    """The journal entry on line, or None if it cannot be read
+    
+    Older versions appended after a torn record instead of truncating it, which
+    glued a whole entry onto the torn one; that entry is recovered. Titles are
+    JSON-escaped, so '{"op": ' only ever starts an entry.
+    """
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        pass
+    start = line.rfind('{"op": ', 1)
+    if start > 0:
+        try:
+            return json.loads(line[start:])
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def journal_entry_id(entry: Dict) -> int:
+    return entry['task']['id'] if entry['op'] == 'put' else entry['id']
+
+
+def renumber_entry(entry: Dict, renumbered: Dict[int, int]) -> Dict:
+    task_id = journal_entry_id(entry)
+    if task_id not in renumbered:
+        return entry
+    if entry['op'] == 'put':
+        return dict(entry, task=dict(entry['task'], id=renumbered[task_id]))
+    return dict(entry, id=renumbered[task_id])
+
+
+def iter_import_rows(path: str, file_format: str) -> Iterator[Dict]:
+    import csv
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def import_row_to_record(row: Dict, task_id: int, created_date: str, problems: Dict[str, int]) -> Optional[Dict]:
+    # Validates one imported row and returns it as a task record, or None to skip
+    # it; every row skipped or imported with a field dropped is counted in problems
+    title = (row.get('title') or '').strip()
+    if not title:
+        problems['untitled'] += 1
+        return None
+    
+    due_date = row.get('due_date') or None
+    if due_date:
+        due = parse_due_date(str(due_date))
+        if due is None:
+            problems['due_date'] += 1
+        due_date = due.isoformat() if due else None
+    
+    priority = str(row.get('priority') or 'medium').strip().lower()
+    if priority not in PRIORITY_ORDER:
+        problems['priority'] += 1
+        priority = 'medium'
+    
+    completed = row.get('completed', False)
+    if isinstance(completed, str):
+        completed = completed.strip().lower() in ('1', 'true', 'yes', 'y', 'x')
+    
+    return {
+        'id': task_id,
+        'title': title,
+        'description': row.get('description') or '',
+        'priority': priority,
+        'due_date': due_date,
+        'completed': bool(completed),
+        'created_date': row.get('created_date') or created_date,
+        'completed_date': (row.get('completed_date') or created_date) if completed else None,
+        # A new task as far as sync is concerned
+        'revision': 1,
+        'modified_date': created_date,
+    }
+
+
+def format_export_text(record: Dict) -> str:
+    lines = [
+        f"[{record['id']}] {record['title']}",
+        f"Status: {'COMPLETED' if record.get('completed') else 'PENDING'}",
+        f"Priority: {record.get('priority', 'medium').upper()}",
+    ]
+    if record.get('description'):
+        lines.append(f"Description: {record['description']}")
+    if record.get('due_date'):
+        lines.append(f"Due Date: {record['due_date']}")
+    lines.append(f"Created: {record.get('created_date')}")
+    if record.get('completed_date'):
+        lines.append(f"Completed: {record['completed_date']}")
+    lines.append("-" * 30 + "\n\n")
+    return "\n".join(lines)
+
+
+@contextmanager
+def open_export(path: str, compress: bool = False):
+    # Binary output for an export; '-' writes to stdout without closing it
+    import gzip
+    if path != '-':
+        with (gzip.open if compress else open)(path, 'wb') as f:
+            yield f
+        return
+    sys.stdout.flush()
+    if compress:
+        with gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb') as f:
+            yield f
+    else:
+        yield sys.stdout.buffer
+    sys.stdout.buffer.flush()
+
+
+def record_fingerprint(record: Dict) -> int:
+    # Equal for the same task whichever backend the record was read from
+    values = [record.get(field) for field in TASK_FIELDS]
+    values[TASK_FIELDS.index('description')] = record.get('description') or ''
+    values[TASK_FIELDS.index('completed')] = bool(record.get('completed'))
+    values[TASK_FIELDS.index('revision')] = record.get('revision') or 0
+    return zlib.crc32(json.dumps(values, ensure_ascii=False).encode('utf-8'))
+
+
+def record_matches(record: Dict, filter_type: str, days: int = 7) -> bool:
+    # Mirrors TaskStore.filtered on raw task records, before any Task is built
+    due = None
+    if filter_type in ("overdue", "today", "upcoming"):
+        due = parse_due_date(record.get('due_date'))
+    return fields_match(bool(record.get('completed', False)), due.toordinal() if due else 0, filter_type, days)
+
+
+def fields_match(completed: bool, due_ordinal: int, filter_type: str, days: int = 7) -> bool:
+    if filter_type == "pending":
+        return not completed
+    if filter_type == "completed":
+        return completed
+    if filter_type in ("overdue", "today", "upcoming"):
+        if completed or not due_ordinal:
+            return False
+        today = today_ordinal()
+        if filter_type == "overdue":
+            return due_ordinal < today
+        if filter_type == "today":
+            return due_ordinal == today
+        return today <= due_ordinal <= today + days
+    return True
+
+
+def display_key(completed: bool, rank: int, due_ordinal: int, task_id: int) -> int:
+    # Listing order (pending first, then priority, then due date) packed
+    # into one integer so a sorted list of keys stays compact.
+    key = (1 if completed else 0) << 2 | min(rank, 3)
+    key = key << DISPLAY_DUE_BITS | (due_ordinal or NO_DUE_ORDINAL)
+    return key << DISPLAY_ID_BITS | task_id
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# Binary task files: a header, one fixed-width record per task, a heap holding
+# the UTF-8 strings and a JSON trailer with the priority names.
+BINARY_EXTENSIONS = ('.tdb',)
+BINARY_MAGIC = b'TODOBIN1'
+BINARY_VERSION = 2
+# magic, version, reserved, record count, heap offset, trailer offset, trailer length
+BINARY_HEADER = struct.Struct('<8sHHQQQI')
+# id, priority, flags, due ordinal, created stamp, completed stamp, then the
+# heap (offset, length) of the title, the description and any extra fields;
+# version 2 adds the modified stamp and revision
+BINARY_RECORDS = {
+    1: struct.Struct('<QBBxxiqqQIQIQI'),
+    2: struct.Struct('<QBBxxiqqQIQIQIqI'),
+}
+BINARY_RECORD = BINARY_RECORDS[BINARY_VERSION]
+BINARY_COMPLETED = 1
+BINARY_EXTRA = 2
+# The record carries a revision and modified date
+BINARY_REVISED = 4
+BINARY_SCAN_RECORDS = 65536
+
+# Completed tasks older than this many days move into archive segments
+ARCHIVE_AFTER_DAYS = 90
+
+# Undo steps kept in the history file next to the task file
+UNDO_HISTORY_STEPS = 100
+# The append-only undo log is rewritten with its live steps once it is this
+# large and more than half of it is steps that fell off the undo stack
+HISTORY_COMPACT_BYTES = 1024 * 1024
+
+WORKSPACE_VERSION = 1
+DEFAULT_LIST_NAME = "tasks"
+
+SEARCH_INDEX_VERSION = 2
+SEARCH_INDEX_HEADER = struct.Struct('<Q')
+# Tasks added or removed since a search index was loaded or built, before the
+# changes are folded into its postings
+SEARCH_INDEX_OVERLAY_TASKS = 10000
+
+# A daemon that has not taken a command within DAEMON_ACCEPT_SECONDS is
+# skipped; one that took it but has not answered within DAEMON_REPLY_SECONDS
+# is given up on
+DAEMON_ACK = b"ok\n"
+DAEMON_ACCEPT_SECONDS = 2
+DAEMON_REPLY_SECONDS = 120
+
+
+def summarize_aggregates(aggregates: Dict) -> Dict:
+    today = date.today().isoformat()
+    return {
+        'total': aggregates['total'],
+        'completed': aggregates['completed'],
+        'overdue': sum(count for due, count in aggregates['pending_by_due'].items() if due < today),
+        'pending_by_priority': {
+            priority: aggregates['pending_by_priority'].get(priority, 0)
+            for priority in PRIORITY_ORDER
+        },
+        'oldest': aggregates['oldest'],
+        'newest': aggregates['newest'],
+    }
+
+
+def merge_statistics(all_stats: List[Dict]) -> Dict:
+    timeline = [stats[key] for stats in all_stats for key in ('oldest', 'newest') if stats[key]]
+    return {
+        'total': sum(stats['total'] for stats in all_stats),
+        'completed': sum(stats['completed'] for stats in all_stats),
+        'overdue': sum(stats['overdue'] for stats in all_stats),
+        'pending_by_priority': {
+            priority: sum(stats['pending_by_priority'].get(priority, 0) for stats in all_stats)
+            for priority in PRIORITY_ORDER
+        },
+        'oldest': min(timeline, key=lambda entry: entry['created_date'] or '', default=None),
+        'newest': max(timeline, key=lambda entry: entry['created_date'] or '', default=None),
+    }
+
+
+def parse_due_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        if len(value) == 10 and value[4] == '-' and value[7] == '-':
+            return date(int(value[:4]), int(value[5:7]), int(value[8:]))
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def parse_created_stamp(value: Optional[str]) -> int:
+    # 'YYYY-MM-DD HH:MM:SS' packed into a sortable YYYYMMDDHHMMSS integer
+    if (value and len(value) == 19 and value[4] == '-' and value[7] == '-'
+            and value[10] == ' ' and value[13] == ':' and value[16] == ':'):
+        digits = value[:4] + value[5:7] + value[8:10] + value[11:13] + value[14:16] + value[17:]
+        if digits.isdigit():
+            return int(digits)
+    return 0
+
+
+def format_created_stamp(stamp: int) -> str:
+    text = str(stamp)
+    return f"{text[:4]}-{text[4:6]}-{text[6:8]} {text[8:10]}:{text[10:12]}:{text[12:]}"
+
+
+def priority_rank(priority: str) -> int:
+    try:
+        return PRIORITY_NAMES.index(priority)
+    except ValueError:
+        PRIORITY_NAMES.append(priority)
+        return len(PRIORITY_NAMES) - 1
+
+
+_today_cache = {'ordinal': 0, 'expires': 0.0}
+
+
+def today_ordinal() -> int:
+    now = time.time()
+    if now >= _today_cache['expires']:
+        today = date.today()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _today_cache['ordinal'] = today.toordinal()
+        _today_cache['expires'] = midnight.timestamp()
+    return _today_cache['ordinal']
+
+
+class Task:
+    
+    # Dates are kept as integers (due date as a date ordinal, created date as
+    # a packed timestamp) and priority as its rank; values that cannot be
+    # parsed are kept verbatim in _raw_dates so they still round-trip.
+    __slots__ = ('id', 'title', 'description', 'priority_rank', 'due_ordinal',
+                 'completed', 'created_stamp', 'completed_date', 'revision', 'modified_stamp',
+                 '_raw_dates')
+    
+    def __init__(self, task_id: int, title: str, description: str = "",
+                 priority: str = "medium", due_date: Optional[str] = None):
+        self.id = task_id
+        self.title = title
+        self.description = description
+        self._raw_dates = None
+        self.priority = priority
+        self.due_date = due_date
+        self.completed = False
+        self.created_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.completed_date = None
+        # Bumped on every change; delta sync uses both to settle conflicts
+        self.revision = 1
+        self.modified_stamp = self.created_stamp
+    
+    @property
+    def priority(self) -> str:
+        return PRIORITY_NAMES[self.priority_rank]
+    
+    @priority.setter
+    def priority(self, value: str):
+        self.priority_rank = priority_rank(value.lower())
+    
+    def _set_raw_date(self, field: str, value: Optional[str]):
+        if value:
+            if self._raw_dates is None:
+                self._raw_dates = {}
+            self._raw_dates[field] = value
+        elif self._raw_dates:
+            self._raw_dates.pop(field, None)
+    
+    @property
+    def due_date(self) -> Optional[str]:
+        if self.due_ordinal:
+            return date.fromordinal(self.due_ordinal).isoformat()
+        return self._raw_dates.get('due_date') if self._raw_dates else None
+    
+    @due_date.setter
+    def due_date(self, value: Optional[str]):
+        due = parse_due_date(value)
+        self.due_ordinal = due.toordinal() if due else 0
+        self._set_raw_date('due_date', None if due else value)
+    
+    @property
+    def created_date(self) -> Optional[str]:
+        if self.created_stamp:
+            return format_created_stamp(self.created_stamp)
+        return self._raw_dates.get('created_date') if self._raw_dates else None
+    
+    @created_date.setter
+    def created_date(self, value: Optional[str]):
+        self.created_stamp = parse_created_stamp(value)
+        self._set_raw_date('created_date', None if self.created_stamp else value)
+    
+    @property
+    def modified_date(self) -> Optional[str]:
+        return format_created_stamp(self.modified_stamp) if self.modified_stamp else None
+    
+    @modified_date.setter
+    def modified_date(self, value: Optional[str]):
+        self.modified_stamp = parse_created_stamp(value)
+    
+    def touch(self):
+        self.revision += 1
+        self.modified_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority,
+            'due_date': self.due_date,
+            'completed': self.completed,
+            'created_date': self.created_date,
+            'completed_date': self.completed_date,
+            'revision': self.revision,
+            'modified_date': self.modified_date
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Task':
+        # Bypasses __init__ so loading does not format a fresh timestamp per task
+        task = cls.__new__(cls)
+        task.id = data['id']
+        task.title = data['title']
+        task.description = data.get('description', '')
+        task._raw_dates = None
+        task.priority = data.get('priority', 'medium')
+        task.due_date = data.get('due_date')
+        task.completed = data.get('completed', False)
+        created_date = data.get('created_date')
+        task.created_date = created_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        task.completed_date = data.get('completed_date')
+        task.revision = data.get('revision') or 0
+        task.modified_date = data.get('modified_date')
+        return task
+    
+    def is_overdue(self) -> bool:
+        return not self.completed and 0 < self.due_ordinal < today_ordinal()
+    
+    def copy(self) -> 'Task':
+        task = Task.__new__(Task)
+        for field in Task.__slots__:
+            setattr(task, field, getattr(self, field))
+        if self._raw_dates:
+            task._raw_dates = dict(self._raw_dates)
+        return task
+    
+    def display_key(self) -> int:
+        return display_key(self.completed, self.priority_rank, self.due_ordinal, self.id)
+
+class TrigramIndex:
+    """Sorted task ids per trigram, read from a saved index one trigram at a time
+    
+    Changes made after the postings were built or loaded are kept in small
+    overlays: ids added per trigram, and ids whose saved postings no longer count.
+    """
+    
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        # (offset, count) of each trigram's postings not yet read from _data
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+        self._data = None
+        self.added: Dict[str, Set[int]] = {}
+        self.added_ids: Set[int] = set()
+        self.removed: Set[int] = set()
+        self.dirty = False
+    
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    @classmethod
+    def task_trigrams(cls, task: Task) -> Set[str]:
+        return cls.trigrams(task.title.lower()) | cls.trigrams(task.description.lower())
+    
+    @classmethod
+    def build(cls, tasks) -> 'TrigramIndex':
+        index = cls()
+        for task in tasks:
+            for trigram in cls.task_trigrams(task):
+                ids = index.postings.get(trigram)
+                if ids is None:
+                    ids = index.postings[trigram] = array('q')
+                ids.append(task.id)
+        for trigram, ids in index.postings.items():
+            index.postings[trigram] = array('q', sorted(ids))
+        index.dirty = True
+        return index
+    
+    def add(self, task: Task):
+        for trigram in self.task_trigrams(task):
+            self.added.setdefault(trigram, set()).add(task.id)
+        self.added_ids.add(task.id)
+        self.dirty = True
+        if len(self.added_ids) >= SEARCH_INDEX_OVERLAY_TASKS:
+            self.fold()
+    
+    def discard(self, task: Task):
+        for trigram in self.task_trigrams(task):
+            ids = self.added.get(trigram)
+            if ids is not None:
+                ids.discard(task.id)
+                if not ids:
+                    del self.added[trigram]
+        self.added_ids.discard(task.id)
+        self.removed.add(task.id)
+        self.dirty = True
+        if len(self.removed) >= SEARCH_INDEX_OVERLAY_TASKS:
+            self.fold()
+    
+    def posting(self, trigram: str) -> array:
+        ids = self.postings.get(trigram)
+        if ids is None:
+            ids = array('q')
+            location = self.offsets.pop(trigram, None)
+            if location is not None:
+                offset, count = location
+                ids.frombytes(self._data[offset:offset + count * ids.itemsize])
+                self.postings[trigram] = ids
+        return ids
+    
+    def _size(self, trigram: str) -> int:
+        ids = self.postings.get(trigram)
+        size = len(ids) if ids is not None else self.offsets.get(trigram, (0, 0))[1]
+        return size + len(self.added.get(trigram, ()))
+    
+    @staticmethod
+    def _contains(ids: array, task_id: int) -> bool:
+        position = bisect.bisect_left(ids, task_id)
+        return position < len(ids) and ids[position] == task_id
+    
+    @staticmethod
+    def intersect(small: array, large: array) -> array:
+        if len(small) > len(large):
+            small, large = large, small
+        if len(small) * 64 > len(large):
+            # Comparable sizes: one pass in C beats a bisect per id
+            return array('q', sorted(set(small).intersection(large)))
+        found = array('q')
+        position = 0
+        for task_id in small:
+            position = bisect.bisect_left(large, task_id, position)
+            if position == len(large):
+                break
+            if large[position] == task_id:
+                found.append(task_id)
+        return found
+    
+    def candidates(self, terms: List[str]) -> Optional[Set[int]]:
+        # Terms shorter than a trigram cannot narrow the search; None means
+        # every task is a candidate.
+        query_trigrams = sorted(set().union(*(self.trigrams(term) for term in terms)), key=self._size)
+        if not query_trigrams:
+            return None
+        
+        found = self.posting(query_trigrams[0])
+        for trigram in query_trigrams[1:]:
+            if not found:
+                break
+            found = self.intersect(found, self.posting(trigram))
+        result = set(found) - self.removed if self.removed else set(found)
+        
+        # Tasks changed since the postings were built match through the overlays
+        for task_id in set().union(*(self.added.get(trigram, ()) for trigram in query_trigrams)):
+            if all(task_id in self.added.get(trigram, ()) or
+                   (task_id not in self.removed and self._contains(self.posting(trigram), task_id))
+                   for trigram in query_trigrams):
+                result.add(task_id)
+        return result
+    
+    def fold(self):
+        """Read every posting and apply the overlays to it"""
+        for trigram in list(self.offsets):
+            self.posting(trigram)
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        for trigram in list(self.postings.keys() | self.added.keys()):
+            ids = set(self.postings.get(trigram, ()))
+            ids.difference_update(self.removed)
+            ids.update(self.added.get(trigram, ()))
+            if ids:
+                self.postings[trigram] = array('q', sorted(ids))
+            else:
+                self.postings.pop(trigram, None)
+        self.added.clear()
+        self.added_ids.clear()
+        self.removed.clear()
+    
+    def save(self, index_file: str, fingerprint: List):
+        # Header length, then the marshalled offset table, then every posting
+        self.fold()
+        offsets, offset = {}, 0
+        for trigram, ids in self.postings.items():
+            offsets[trigram] = (offset, len(ids))
+            offset += len(ids) * ids.itemsize
+        header = marshal.dumps((SEARCH_INDEX_VERSION, fingerprint, offsets))
+        temp_file = index_file + ".tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(SEARCH_INDEX_HEADER.pack(len(header)))
+            f.write(header)
+            for ids in self.postings.values():
+                ids.tofile(f)
+        os.replace(temp_file, index_file)
+        self.dirty = False
+    
+    @classmethod
+    def load(cls, index_file: str, fingerprint: List) -> Optional['TrigramIndex']:
+        import mmap
+        try:
+            with open(index_file, 'rb') as f:
+                (header_length,) = SEARCH_INDEX_HEADER.unpack(f.read(SEARCH_INDEX_HEADER.size))
+                if header_length > os.fstat(f.fileno()).st_size:
+                    return None
+                version, saved_fingerprint, offsets = marshal.loads(f.read(header_length))
+                if version != SEARCH_INDEX_VERSION or saved_fingerprint != fingerprint:
+                    return None
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, EOFError, ValueError, TypeError, struct.error):
+            return None
+        
+        index = cls()
+        start = SEARCH_INDEX_HEADER.size + header_length
+        index.offsets = {trigram: (start + offset, count) for trigram, (offset, count) in offsets.items()}
+        index._data = data
+        return index
+
+
+class TaskQuery:
+    """A parsed query such as: priority:high due<2026-11-01 -completed "release"
+    
+    Every term must match and a leading '-' negates a term. Bare words and
+    quoted phrases are matched against titles and descriptions.
+    """
+    
+    TERM = re.compile(r'(-?)(?:"([^"]*)"|(\S+))')
+    FIELD = re.compile(r'([a-z]+)(<=|>=|:|=|<|>)(.+)$')
+    FIELD_ALIASES = {'p': 'priority', 'is': 'status', 'desc': 'description'}
+    FIELDS = ('id', 'priority', 'status', 'due', 'created', 'title', 'description')
+    STATUSES = ('pending', 'completed', 'overdue', 'today')
+    COMPARISONS = {
+        '<': lambda a, b: a < b,
+        '<=': lambda a, b: a <= b,
+        '>': lambda a, b: a > b,
+        '>=': lambda a, b: a >= b,
+        ':': lambda a, b: a == b,
+    }
+    
+    def __init__(self, text: str):
+        self.text = text
+        # (field, operator, value, negated) with values already in the form tasks are compared in
+        self.clauses: List[tuple] = []
+        for match in self.TERM.finditer(text):
+            negated = match.group(1) == '-'
+            if match.group(2) is not None:
+                if match.group(2).strip():
+                    self.clauses.append(('text', ':', match.group(2).lower(), negated))
+            else:
+                self.clauses.append(self._parse_term(match.group(3).lower(), negated))
+        if not self.clauses:
+            raise ValueError("the query is empty")
+    
+    def _parse_term(self, word: str, negated: bool) -> tuple:
+        if word in self.STATUSES or word == 'done':
+            return ('status', ':', 'completed' if word == 'done' else word, negated)
+        match = self.FIELD.match(word)
+        field = match and self.FIELD_ALIASES.get(match.group(1), match.group(1))
+        if field not in self.FIELDS:
+            # Words such as 'http://...' are plain text
+            return ('text', ':', word, negated)
+        
+        op, value = match.group(2), match.group(3)
+        if op == '=':
+            op = ':'
+        if op != ':' and field in ('priority', 'status', 'title', 'description'):
+            raise ValueError(f"'{field}' only supports ':' in '{word}'")
+        
+        if field == 'id':
+            value = self._parse_id_ranges(value) if op == ':' else self._parse_int(value, word)
+        elif field == 'priority':
+            names = value.split(',')
+            if any(name not in PRIORITY_ORDER for name in names):
+                raise ValueError(f"unknown priority in '{word}' (use low, medium or high)")
+            value = frozenset(PRIORITY_ORDER[name] for name in names)
+        elif field == 'status':
+            if value == 'done':
+                value = 'completed'
+            if value not in self.STATUSES:
+                raise ValueError(f"unknown status in '{word}' (use {', '.join(self.STATUSES)})")
+        elif field == 'due':
+            # due:none matches tasks without a due date
+            value = 0 if op == ':' and value == 'none' else self._parse_date(value, word).toordinal()
+        elif field == 'created':
+            day = self._parse_date(value, word)
+            value = day.year * 10000 + day.month * 100 + day.day
+        return (field, op, value, negated)
+    
+    @staticmethod
+    def _parse_int(value: str, word: str) -> int:
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"expected a number in '{word}'")
+    
+    @classmethod
+    def _parse_id_ranges(cls, value: str) -> tuple:
+        # 'id:4-9,12' becomes ((4, 9), (12, 12))
+        ranges = []
+        for part in value.split(','):
+            first, _, last = part.partition('-')
+            first = cls._parse_int(first, value)
+            ranges.append((first, cls._parse_int(last, value) if last else first))
+        return tuple(ranges)
+    
+    @staticmethod
+    def _parse_date(value: str, word: str) -> date:
+        relative = {'yesterday': -1, 'today': 0, 'tomorrow': 1}
+        if value in relative:
+            return date.fromordinal(today_ordinal() + relative[value])
+        day = parse_due_date(value)
+        if day is None:
+            raise ValueError(f"expected a YYYY-MM-DD date in '{word}'")
+        return day
+    
+    def matches(self, task: Task) -> bool:
+        return all(self._clause_matches(task, field, op, value) != negated
+                   for field, op, value, negated in self.clauses)
+    
+    def _clause_matches(self, task: Task, field: str, op: str, value) -> bool:
+        if field == 'text':
+            return value in task.title.lower() or value in task.description.lower()
+        if field == 'title':
+            return value in task.title.lower()
+        if field == 'description':
+            return value in task.description.lower()
+        if field == 'id':
+            if op == ':':
+                return any(first <= task.id <= last for first, last in value)
+            return self.COMPARISONS[op](task.id, value)
+        if field == 'priority':
+            return task.priority_rank in value
+        if field == 'status':
+            if value == 'pending':
+                return not task.completed
+            if value == 'completed':
+                return bool(task.completed)
+            if value == 'overdue':
+                return task.is_overdue()
+            return not task.completed and task.due_ordinal == today_ordinal()
+        if field == 'due':
+            if op == ':' and not value:
+                return not task.due_ordinal
+            return bool(task.due_ordinal) and self.COMPARISONS[op](task.due_ordinal, value)
+        # created
+        return bool(task.created_stamp) and self.COMPARISONS[op](task.created_stamp // 1000000, value)
+
+
+class TaskStore:
+    
+    def __init__(self, tasks: Optional[List[Task]] = None):
+        self.by_id: Dict[int, Task] = {}
+        # Task.display_key() of every task, kept sorted for paged listings. Keys
+        # start with the completed flag and priority rank, so the tasks of a
+        # status or priority are slices of it and need no index of their own.
+        self.display_order = array('Q')
+        # due ordinal << DISPLAY_ID_BITS | id for pending tasks with a due date, kept sorted
+        self.due_timeline = array('q')
+        # State of each task before it was first touched in the open transaction
+        self._undo: Optional[Dict[int, Optional[Task]]] = None
+        self.text_index: Optional[TrigramIndex] = None
+        self.load_text_index: Optional[Callable[[], Optional[TrigramIndex]]] = None
+        
+        # Running aggregates behind statistics()
+        self.pending_by_priority: Dict[str, int] = {}
+        self.pending_by_due: Dict[int, int] = {}
+        # Created stamps and ids of every task, both in (stamp, id) order
+        self.created_stamps = array('q')
+        self.created_ids = array('q')
+        
+        for task in tasks or []:
+            existing = self.by_id.get(task.id)
+            if existing is not None:
+                self._unindex(existing)
+            self.by_id[task.id] = task
+            self._index(task, ordered=False)
+        by_created = sorted(self.by_id.values(), key=lambda task: (task.created_stamp, task.id))
+        self.created_stamps = array('q', (task.created_stamp for task in by_created))
+        self.created_ids = array('q', (task.id for task in by_created))
+        self.due_timeline = array('q', sorted(
+            task.due_ordinal << DISPLAY_ID_BITS | task.id
+            for task in self.by_id.values() if task.due_ordinal and not task.completed
+        ))
+        self.display_order = array('Q', sorted(task.display_key() for task in self.by_id.values()))
+    
+    def __len__(self) -> int:
+        return len(self.by_id)
+    
+    def __iter__(self):
+        return iter(self.by_id.values())
+    
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self.by_id
+    
+    def _index(self, task: Task, text: bool = True, ordered: bool = True):
+        # ordered=False skips the sorted lists, which bulk loads sort once instead
+        if text and self.text_index is not None:
+            self.text_index.add(task)
+        if ordered:
+            bisect.insort(self.display_order, task.display_key())
+        due = task.due_ordinal
+        if not task.completed:
+            self.pending_by_priority[task.priority] = self.pending_by_priority.get(task.priority, 0) + 1
+            if due:
+                self.pending_by_due[due] = self.pending_by_due.get(due, 0) + 1
+                if ordered:
+                    bisect.insort(self.due_timeline, due << DISPLAY_ID_BITS | task.id)
+    
+    def _unindex(self, task: Task, text: bool = True):
+        if text and self.text_index is not None:
+            self.text_index.discard(task)
+        self._remove_sorted(self.display_order, task.display_key())
+        due = task.due_ordinal
+        if not task.completed:
+            self._decrement(self.pending_by_priority, task.priority)
+            if due:
+                self._decrement(self.pending_by_due, due)
+                self._remove_sorted(self.due_timeline, due << DISPLAY_ID_BITS | task.id)
+    
+    @staticmethod
+    def _decrement(counts: Dict, key):
+        counts[key] -= 1
+        if not counts[key]:
+            del counts[key]
+    
+    @staticmethod
+    def _remove_sorted(entries: array, entry: int):
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+    
+    def _created_position(self, task: Task) -> int:
+        # Tasks created in the same second are ordered by id
+        start = bisect.bisect_left(self.created_stamps, task.created_stamp)
+        end = bisect.bisect_right(self.created_stamps, task.created_stamp, start)
+        return bisect.bisect_left(self.created_ids, task.id, start, end)
+    
+    def _track_created(self, task: Task):
+        position = self._created_position(task)
+        self.created_stamps.insert(position, task.created_stamp)
+        self.created_ids.insert(position, task.id)
+    
+    def _untrack_created(self, task: Task):
+        position = self._created_position(task)
+        if (position < len(self.created_ids) and self.created_ids[position] == task.id
+                and self.created_stamps[position] == task.created_stamp):
+            del self.created_stamps[position]
+            del self.created_ids[position]
+    
+    def _pending_count(self) -> int:
+        # Keys of completed tasks sort after every pending one
+        return bisect.bisect_left(self.display_order, DISPLAY_COMPLETED_KEY)
+    
+    def _keys_between(self, low: int, high: int) -> array:
+        return self.display_order[bisect.bisect_left(self.display_order, low):
+                                  bisect.bisect_left(self.display_order, high)]
+    
+    def get(self, task_id: int) -> Optional[Task]:
+        return self.by_id.get(task_id)
+    
+    def begin(self):
+        self._undo = {}
+    
+    def commit(self) -> Dict[int, Optional[Task]]:
+        # The state before the transaction of every task it touched
+        undo, self._undo = self._undo or {}, None
+        return undo
+    
+    def rollback(self):
+        undo, self._undo = self._undo or {}, None
+        for task_id, previous in undo.items():
+            current = self.by_id.get(task_id)
+            if current is not None:
+                self.remove(current)
+            if previous is not None:
+                self.put(previous)
+    
+    def _remember(self, task_id: int):
+        if self._undo is not None and task_id not in self._undo:
+            existing = self.by_id.get(task_id)
+            self._undo[task_id] = existing.copy() if existing is not None else None
+    
+    def put(self, task: Task):
+        self._remember(task.id)
+        existing = self.by_id.get(task.id)
+        if existing is not None:
+            self._unindex(existing)
+            self._untrack_created(existing)
+        self.by_id[task.id] = task
+        self._index(task)
+        self._track_created(task)
+    
+    def put_many(self, tasks: List[Task]):
+        for task in tasks:
+            self.put(task)
+    
+    def remove(self, task: Task):
+        self._remember(task.id)
+        existing = self.by_id.pop(task.id, None)
+        if existing is not None:
+            self._unindex(existing)
+            self._untrack_created(existing)
+    
+    def update(self, task: Task, **changes):
+        self._remember(task.id)
+        # Indexed fields must never change behind the store's back
+        text = 'title' in changes or 'description' in changes
+        self._unindex(task, text)
+        for field, value in changes.items():
+            setattr(task, field, value)
+        task.touch()
+        self._index(task, text)
+    
+    def max_id(self) -> int:
+        return max(self.by_id, default=0)
+    
+    def pending(self) -> List[Task]:
+        return [self.by_id[key & DISPLAY_ID_MASK] for key in self.display_order[:self._pending_count()]]
+    
+    def completed(self) -> List[Task]:
+        return [self.by_id[key & DISPLAY_ID_MASK] for key in self.display_order[self._pending_count():]]
+    
+    def due_between(self, first: int, last: int) -> List[Task]:
+        # Pending tasks due between two date ordinals, both inclusive
+        start = bisect.bisect_left(self.due_timeline, first << DISPLAY_ID_BITS)
+        end = bisect.bisect_left(self.due_timeline, (last + 1) << DISPLAY_ID_BITS)
+        return [self.by_id[key & DISPLAY_ID_MASK] for key in self.due_timeline[start:end]]
+    
+    def overdue(self) -> List[Task]:
+        return self.due_between(1, today_ordinal() - 1)
+    
+    def due_today(self) -> List[Task]:
+        return self.due_between(today_ordinal(), today_ordinal())
+    
+    def due_within(self, days: int) -> List[Task]:
+        return self.due_between(today_ordinal(), today_ordinal() + days)
+    
+    def filtered(self, filter_type: str, days: int = 7) -> List[Task]:
+        if filter_type == "pending":
+            return self.pending()
+        if filter_type == "completed":
+            return self.completed()
+        if filter_type == "overdue":
+            return self.overdue()
+        if filter_type == "today":
+            return self.due_today()
+        if filter_type == "upcoming":
+            return self.due_within(days)
+        return list(self.by_id.values())
+    
+    def count(self, filter_type: str = "all", days: int = 7) -> int:
+        if filter_type == "pending":
+            return self._pending_count()
+        if filter_type == "completed":
+            return len(self.by_id) - self._pending_count()
+        if filter_type in ("overdue", "today", "upcoming"):
+            return len(self.filtered(filter_type, days))
+        return len(self.by_id)
+    
+    def listing(self, filter_type: str = "all", days: int = 7,
+                limit: Optional[int] = None, offset: int = 0) -> List[Task]:
+        if filter_type in ("overdue", "today", "upcoming"):
+            # Date filters are already narrowed by the timeline; pick the page with a heap
+            matching = self.filtered(filter_type, days)
+            if limit is None:
+                page_keys = sorted(task.display_key() for task in matching)[offset:]
+            else:
+                page_keys = heapq.nsmallest(offset + limit,
+                                            (task.display_key() for task in matching))[offset:]
+        else:
+            # Pending keys sort before completed ones, so both filters are slices
+            start, end = 0, len(self.display_order)
+            if filter_type == "pending":
+                end = self._pending_count()
+            elif filter_type == "completed":
+                start = self._pending_count()
+            start = min(start + offset, end)
+            if limit is not None:
+                end = min(end, start + limit)
+            page_keys = self.display_order[start:end]
+        
+        return [self.by_id[key & DISPLAY_ID_MASK] for key in page_keys]
+    
+    def _text_index(self) -> TrigramIndex:
+        if self.text_index is None and self.load_text_index:
+            self.text_index = self.load_text_index()
+        if self.text_index is None:
+            self.text_index = TrigramIndex.build(self.by_id.values())
+        return self.text_index
+    
+    def search(self, query: str) -> List[Task]:
+        terms = query.lower().split()
+        if not terms:
+            return []
+        
+        candidate_ids = self._text_index().candidates(terms)
+        if candidate_ids is None:
+            candidates = self.by_id.values()
+        else:
+            candidates = (self.by_id[task_id] for task_id in sorted(candidate_ids))
+        
+        return [
+            task for task in candidates
+            if all(term in task.title.lower() or term in task.description.lower() for term in terms)
+        ]
+    
+    def query(self, query: TaskQuery) -> List[Task]:
+        """Tasks matching query, in listing order"""
+        # Indexed terms narrow the candidates, smallest set first; the whole
+        # query is then checked once against whatever is left.
+        pending_only = any(field == 'status' and value != 'completed' and not negated
+                           for field, _, value, negated in query.clauses)
+        candidate_sets = []
+        for field, op, value, negated in query.clauses:
+            if not negated:
+                ids = self._clause_ids(field, op, value, pending_only)
+                if ids is not None:
+                    candidate_sets.append(ids)
+        
+        if candidate_sets:
+            candidate_sets.sort(key=len)
+            candidate_ids = set(candidate_sets[0])
+            for ids in candidate_sets[1:]:
+                if not candidate_ids:
+                    break
+                candidate_ids.intersection_update(ids)
+            candidates = (self.by_id[task_id] for task_id in candidate_ids)
+        else:
+            candidates = self.by_id.values()
+        
+        return sorted((task for task in candidates if query.matches(task)), key=lambda task: task.display_key())
+    
+    def _clause_ids(self, field: str, op: str, value, pending_only: bool):
+        # Ids of the tasks that may match one query term, or None if no index applies
+        if field in ('text', 'title', 'description'):
+            return self._text_index().candidates([value])
+        if field == 'id' and op == ':':
+            ids = set()
+            for first, last in value:
+                if last - first >= len(self.by_id):
+                    # A range wider than the task list is checked against the tasks instead
+                    ids.update(task_id for task_id in self.by_id if first <= task_id <= last)
+                else:
+                    ids.update(task_id for task_id in range(first, last + 1) if task_id in self.by_id)
+            return ids
+        if field == 'priority':
+            # Ranks past 3 share a key prefix; query.matches() tells them apart
+            ids = set()
+            for rank in value:
+                for status_key in (0, DISPLAY_COMPLETED_KEY):
+                    low = status_key + min(rank, 3) * DISPLAY_RANK_KEY
+                    ids.update(key & DISPLAY_ID_MASK for key in self._keys_between(low, low + DISPLAY_RANK_KEY))
+            return ids
+        if field == 'status':
+            if value in ('pending', 'completed'):
+                low = DISPLAY_COMPLETED_KEY if value == 'completed' else 0
+                return {key & DISPLAY_ID_MASK for key in self._keys_between(low, low + DISPLAY_COMPLETED_KEY)}
+            return {task.id for task in (self.overdue() if value == 'overdue' else self.due_today())}
+        if field == 'due' and pending_only and value:
+            # The due timeline only holds pending tasks
+            first, last = 1, date.max.toordinal()
+            if op in ('<', '<='):
+                last = value - (op == '<')
+            elif op in ('>', '>='):
+                first = value + (op == '>')
+            else:
+                first = last = value
+            return {task.id for task in self.due_between(first, last)}
+        if field == 'created':
+            bounds = {'<': (1, value * 1000000), '<=': (1, (value + 1) * 1000000),
+                      '>': ((value + 1) * 1000000, None), '>=': (value * 1000000, None),
+                      ':': (value * 1000000, (value + 1) * 1000000)}
+            low, high = bounds[op]
+            start = bisect.bisect_left(self.created_stamps, low)
+            end = len(self.created_stamps) if high is None else bisect.bisect_left(self.created_stamps, high)
+            return set(self.created_ids[start:end])
+        return None
+    
+    def _timeline_entry(self, position: int) -> Optional[Dict]:
+        if not self.created_ids:
+            return None
+        task = self.by_id[self.created_ids[position]]
+        return {'title': task.title, 'created_date': task.created_date}
+    
+    def aggregates(self) -> Dict:
+        return {
+            'total': len(self.by_id),
+            'completed': len(self.by_id) - self._pending_count(),
+            'pending_by_priority': dict(self.pending_by_priority),
+            'pending_by_due': {
+                date.fromordinal(due).isoformat(): count for due, count in self.pending_by_due.items()
+            },
+            'oldest': self._timeline_entry(0),
+            'newest': self._timeline_entry(-1),
+        }
+    
+    def statistics(self) -> Dict:
+        return summarize_aggregates(self.aggregates())
+
+
+class SqliteTaskStore:
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            priority TEXT NOT NULL DEFAULT 'medium',
+            due_date TEXT,
+            completed INTEGER NOT NULL DEFAULT 0,
+            created_date TEXT NOT NULL,
+            completed_date TEXT,
+            revision INTEGER NOT NULL DEFAULT 0,
+            modified_date TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed);
+        CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, completed);
+        CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date);
+        CREATE INDEX IF NOT EXISTS idx_tasks_created_date ON tasks (created_date);
+    """
+    
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE tasks_fts USING fts5(
+            title, description, content='tasks', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END;
+        CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END;
+        CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END;
+        INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');
+    """
+    
+    COLUMNS = ('id', 'title', 'description', 'priority', 'due_date',
+               'completed', 'created_date', 'completed_date', 'revision', 'modified_date')
+    # Columns added after the first schema, created in older databases on open
+    ADDED_COLUMNS = (('revision', 'INTEGER NOT NULL DEFAULT 0'), ('modified_date', 'TEXT'))
+    
+    LISTING_ORDER = """
+        ORDER BY completed,
+                 CASE priority WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END,
+                 COALESCE(due_date, '9999-12-31'),
+                 id
+    """
+    
+    FILTERS = {
+        "all": "",
+        "pending": "WHERE completed = 0",
+        "completed": "WHERE completed = 1",
+        "overdue": "WHERE completed = 0 AND due_date IS NOT NULL AND due_date < :today",
+        "today": "WHERE completed = 0 AND due_date = :today",
+        "upcoming": "WHERE completed = 0 AND due_date BETWEEN :today AND :until",
+    }
+    
+    def __init__(self, db_file: str):
+        import sqlite3
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._ensure_columns()
+        self.has_fts = self._ensure_fts()
+        self.in_transaction = False
+        # State of each task before it was first touched in the open transaction
+        self._undo: Optional[Dict[int, Optional[Task]]] = None
+    
+    def _ensure_columns(self):
+        existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        with self.conn:
+            for column, definition in self.ADDED_COLUMNS:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {definition}")
+    
+    def _ensure_fts(self) -> bool:
+        import sqlite3
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            self.conn.executescript("BEGIN;" + self.FTS_SCHEMA + "COMMIT;")
+            return True
+        except sqlite3.OperationalError:
+            # SQLite builds without FTS5 or the trigram tokenizer fall back to scanning
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            return False
+    
+    def _row_to_task(self, row: 'sqlite3.Row') -> Task:
+        data = dict(row)
+        data['completed'] = bool(data['completed'])
+        return Task.from_dict(data)
+    
+    def _task_to_row(self, task: Task) -> tuple:
+        return (task.id, task.title, task.description, task.priority, task.due_date,
+                int(bool(task.completed)), task.created_date, task.completed_date,
+                task.revision, task.modified_date)
+    
+    def _select(self, where: str = "", params=(), order: str = "") -> List[Task]:
+        rows = self.conn.execute(f"SELECT * FROM tasks {where} {order}", params)
+        return [self._row_to_task(row) for row in rows]
+    
+    def iter_records(self, filter_type: str = "all", days: int = 7) -> Iterator[Dict]:
+        where = self.FILTERS.get(filter_type, "")
+        for row in self.conn.execute(f"SELECT * FROM tasks {where} ORDER BY id", self._date_params(days)):
+            record = dict(row)
+            record['completed'] = bool(record['completed'])
+            yield record
+    
+    def iter_modified_records(self, since: str) -> Iterator[Dict]:
+        for row in self.conn.execute("SELECT * FROM tasks WHERE modified_date >= ? ORDER BY id", (since,)):
+            record = dict(row)
+            record['completed'] = bool(record['completed'])
+            yield record
+    
+    def ids(self) -> Set[int]:
+        return {row[0] for row in self.conn.execute("SELECT id FROM tasks")}
+    
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    
+    def __iter__(self):
+        for row in self.conn.execute("SELECT * FROM tasks ORDER BY id"):
+            yield self._row_to_task(row)
+    
+    def __bool__(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is not None
+    
+    def __contains__(self, task_id: int) -> bool:
+        return self.conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is not None
+    
+    def get(self, task_id: int) -> Optional[Task]:
+        row = self.conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+    
+    def put(self, task: Task):
+        self.put_many([task])
+    
+    def put_many(self, tasks: List[Task]):
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        # An upsert rather than INSERT OR REPLACE, so the FTS update trigger fires
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in self.COLUMNS[1:])
+        for task in tasks:
+            self._remember(task.id)
+        self.conn.executemany(
+            f"INSERT INTO tasks ({', '.join(self.COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (id) DO UPDATE SET {assignments}",
+            (self._task_to_row(task) for task in tasks)
+        )
+        self._autocommit()
+    
+    def remove(self, task: Task):
+        self._remember(task.id)
+        self.conn.execute("DELETE FROM tasks WHERE id = ?", (task.id,))
+        self._autocommit()
+    
+    def _autocommit(self):
+        if not self.in_transaction:
+            self.conn.commit()
+    
+    def _remember(self, task_id: int):
+        if self._undo is not None and task_id not in self._undo:
+            self._undo[task_id] = self.get(task_id)
+    
+    def begin(self):
+        self.in_transaction = True
+        self._undo = {}
+    
+    def commit(self) -> Dict[int, Optional[Task]]:
+        self.in_transaction = False
+        self.conn.commit()
+        undo, self._undo = self._undo or {}, None
+        return undo
+    
+    def rollback(self):
+        self.in_transaction = False
+        self._undo = None
+        self.conn.rollback()
+    
+    def update(self, task: Task, **changes):
+        for field, value in changes.items():
+            setattr(task, field, value)
+        task.touch()
+        self.put(task)
+    
+    def close(self):
+        self.conn.close()
+    
+    def max_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+    
+    def pending(self) -> List[Task]:
+        return self._select(self.FILTERS["pending"])
+    
+    def completed(self) -> List[Task]:
+        return self._select(self.FILTERS["completed"])
+    
+    def overdue(self) -> List[Task]:
+        return self.filtered("overdue")
+    
+    def due_today(self) -> List[Task]:
+        return self.filtered("today")
+    
+    def due_within(self, days: int) -> List[Task]:
+        return self.filtered("upcoming", days)
+    
+    @staticmethod
+    def _date_params(days: int = 7) -> Dict[str, str]:
+        today = date.fromordinal(today_ordinal())
+        return {'today': today.isoformat(), 'until': (today + timedelta(days=days)).isoformat()}
+    
+    def filtered(self, filter_type: str, days: int = 7) -> List[Task]:
+        where = self.FILTERS.get(filter_type, "")
+        return self._select(where, self._date_params(days))
+    
+    def count(self, filter_type: str = "all", days: int = 7) -> int:
+        where = self.FILTERS.get(filter_type, "")
+        return self.conn.execute(f"SELECT COUNT(*) FROM tasks {where}", self._date_params(days)).fetchone()[0]
+    
+    def listing(self, filter_type: str = "all", days: int = 7,
+                limit: Optional[int] = None, offset: int = 0) -> List[Task]:
+        where = self.FILTERS.get(filter_type, "")
+        params = self._date_params(days)
+        order = self.LISTING_ORDER
+        if limit is not None or offset:
+            order += " LIMIT :limit OFFSET :offset"
+            params.update(limit=-1 if limit is None else limit, offset=offset)
+        return self._select(where, params, order)
+    
+    def search(self, query: str) -> List[Task]:
+        terms = query.lower().split()
+        if not terms:
+            return []
+        
+        conditions = []
+        params: List[str] = []
+        indexed_terms = [term for term in terms if self.has_fts and len(term) >= 3]
+        if indexed_terms:
+            phrases = " AND ".join('"' + term.replace('"', '""') + '"' for term in indexed_terms)
+            conditions.append("id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+            params.append(phrases)
+        for term in terms:
+            if term not in indexed_terms:
+                conditions.append("(instr(lower(title), ?) > 0 OR instr(lower(description), ?) > 0)")
+                params.extend([term, term])
+        
+        return self._select("WHERE " + " AND ".join(conditions) + " ORDER BY id", params)
+    
+    def query(self, query: TaskQuery) -> List[Task]:
+        """Tasks matching query, in listing order"""
+        conditions = []
+        params: List = []
+        for field, op, value, negated in query.clauses:
+            condition, values = self._clause_sql(field, op, value)
+            # Comparisons with NULL count as a non-match, also when negated
+            conditions.append(f"NOT COALESCE(({condition}), 0)" if negated else condition)
+            params.extend(values)
+        return self._select("WHERE " + " AND ".join(conditions), params, self.LISTING_ORDER)
+    
+    def _clause_sql(self, field: str, op: str, value) -> tuple:
+        if field == 'text':
+            if self.has_fts and len(value) >= 3:
+                return "id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)", ['"' + value.replace('"', '""') + '"']
+            return "(instr(lower(title), ?) > 0 OR instr(lower(description), ?) > 0)", [value, value]
+        if field in ('title', 'description'):
+            return f"instr(lower({field}), ?) > 0", [value]
+        if field == 'id':
+            if op != ':':
+                return f"id {op} ?", [value]
+            return "(" + " OR ".join("id BETWEEN ? AND ?" for _ in value) + ")", [bound for pair in value for bound in pair]
+        if field == 'priority':
+            names = [PRIORITY_NAMES[rank] for rank in value]
+            return f"priority IN ({', '.join('?' * len(names))})", names
+        today = date.fromordinal(today_ordinal()).isoformat()
+        if field == 'status':
+            conditions = {
+                'pending': ("completed = 0", []),
+                'completed': ("completed = 1", []),
+                'overdue': ("completed = 0 AND due_date < ?", [today]),
+                'today': ("completed = 0 AND due_date = ?", [today]),
+            }
+            return conditions[value]
+        if field == 'due':
+            if op == ':' and not value:
+                return "due_date IS NULL", []
+            return f"due_date {'=' if op == ':' else op} ?", [date.fromordinal(value).isoformat()]
+        # created: compared by day against the indexed 'YYYY-MM-DD HH:MM:SS' text
+        day = date(value // 10000, value // 100 % 100, value % 100)
+        start, end = day.isoformat(), (day + timedelta(days=1)).isoformat()
+        conditions = {
+            '<': ("created_date < ?", [start]),
+            '<=': ("created_date < ?", [end]),
+            '>': ("created_date >= ?", [end]),
+            '>=': ("created_date >= ?", [start]),
+            ':': ("created_date >= ? AND created_date < ?", [start, end]),
+        }
+        return conditions[op]
+    
+    def statistics(self) -> Dict:
+        total, completed = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks"
+        ).fetchone()
+        overdue = self.conn.execute(
+            f"SELECT COUNT(*) FROM tasks {self.FILTERS['overdue']}",
+            {'today': date.today().isoformat()}
+        ).fetchone()[0]
+        pending_by_priority = {priority: 0 for priority in PRIORITY_ORDER}
+        for priority, count in self.conn.execute(
+            "SELECT priority, COUNT(*) FROM tasks WHERE completed = 0 GROUP BY priority"
+        ):
+            pending_by_priority[priority] = count
+        timeline = {}
+        for key, order in (('oldest', "created_date, id"), ('newest', "created_date DESC, id DESC")):
+            row = self.conn.execute(
+                f"SELECT title, created_date FROM tasks ORDER BY {order} LIMIT 1"
+            ).fetchone()
+            timeline[key] = dict(row) if row else None
+        return {
+            'total': total,
+            'completed': completed,
+            'overdue': overdue,
+            'pending_by_priority': pending_by_priority,
+            'oldest': timeline['oldest'],
+            'newest': timeline['newest'],
+        }
+
+
+def write_binary_tasks(path: str, records: Iterable[Dict]) -> int:
+    """Write task records as a binary task file and return how many were written"""
+    import tempfile
+    # Records follow the header directly while strings are spooled to a
+    # temporary heap, appended once the record count is known.
+    priorities: Dict[str, int] = {}
+    heap_size = 0
+    count = 0
+    with open(path, 'wb', buffering=1024 * 1024) as f, \
+            tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path))) as heap:
+        
+        def store(text: str) -> tuple:
+            nonlocal heap_size
+            data = text.encode('utf-8')
+            heap.write(data)
+            heap_size += len(data)
+            return heap_size - len(data), len(data)
+        
+        f.write(bytes(BINARY_HEADER.size))
+        for record in records:
+            # Anything the fixed fields cannot reproduce exactly is kept as JSON
+            extra = {key: value for key, value in record.items() if key not in TASK_FIELDS}
+            
+            task_id = record.get('id')
+            if type(task_id) is not int or task_id < 0:
+                extra['id'], task_id = task_id, 0
+            
+            texts = []
+            for field in ('title', 'description'):
+                value = record.get(field, '')
+                if type(value) is not str:
+                    extra[field], value = value, ''
+                texts.append(store(value))
+            
+            priority = record.get('priority', 'medium')
+            if type(priority) is str and (priority in priorities or len(priorities) < 256):
+                rank = priorities.setdefault(priority, len(priorities))
+            else:
+                extra['priority'] = priority
+                rank = priorities.setdefault('medium', len(priorities))
+            
+            due_date = record.get('due_date')
+            due = parse_due_date(due_date)
+            due_ordinal = due.toordinal() if due else 0
+            if due_date is not None and (due is None or due.isoformat() != due_date):
+                extra['due_date'], due_ordinal = due_date, 0
+            
+            stamps = []
+            for field in ('created_date', 'completed_date'):
+                value = record.get(field)
+                stamp = parse_created_stamp(value)
+                if value is not None and (not stamp or format_created_stamp(stamp) != value):
+                    extra[field], stamp = value, 0
+                stamps.append(stamp)
+            
+            completed = record.get('completed', False)
+            if type(completed) is not bool:
+                extra['completed'], completed = completed, bool(completed)
+            
+            flags = BINARY_COMPLETED if completed else 0
+            revision, modified = 0, 0
+            if 'revision' in record and 'modified_date' in record:
+                flags |= BINARY_REVISED
+                revision = record['revision']
+                if type(revision) is not int or not 0 <= revision < 2 ** 32:
+                    extra['revision'], revision = revision, 0
+                value = record['modified_date']
+                modified = parse_created_stamp(value)
+                if value is not None and (not modified or format_created_stamp(modified) != value):
+                    extra['modified_date'], modified = value, 0
+            else:
+                for field in ('revision', 'modified_date'):
+                    if field in record:
+                        extra[field] = record[field]
+            
+            extra_ref = (0, 0)
+            if extra:
+                flags |= BINARY_EXTRA
+                extra_ref = store(json.dumps(extra, ensure_ascii=False))
+            f.write(BINARY_RECORD.pack(task_id, rank, flags, due_ordinal, stamps[0], stamps[1],
+                                       *texts[0], *texts[1], *extra_ref, modified, revision))
+            count += 1
+        
+        heap_offset = f.tell()
+        heap.seek(0)
+        while True:
+            chunk = heap.read(1024 * 1024)
+            if not chunk:
+                break
+            f.write(chunk)
+        trailer = json.dumps({'priorities': list(priorities)}, ensure_ascii=False).encode('utf-8')
+        trailer_offset = f.tell()
+        f.write(trailer)
+        f.seek(0)
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, count,
+                                   heap_offset, trailer_offset, len(trailer)))
+    return count
+
+
+class BinaryTaskFile:
+    """Read-only, memory-mapped view of a binary task file"""
+    
+    def __init__(self, path: str):
+        import mmap
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, _, self.count, self.heap_offset,
+             trailer_offset, trailer_length) = BINARY_HEADER.unpack_from(self.map)
+            if magic != BINARY_MAGIC or version not in BINARY_RECORDS:
+                raise ValueError(f"'{path}' is not a binary task file")
+            self.record = BINARY_RECORDS[version]
+            trailer = json.loads(self.map[trailer_offset:trailer_offset + trailer_length])
+            self.priorities: List[str] = trailer['priorities']
+        except (struct.error, ValueError, KeyError):
+            self.map.close()
+            raise
+    
+    def close(self):
+        self.map.close()
+    
+    def __enter__(self) -> 'BinaryTaskFile':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def iter_fixed(self) -> Iterator[tuple]:
+        # Only the fixed-width records are read, in chunks; strings stay on disk
+        for first in range(0, self.count, BINARY_SCAN_RECORDS):
+            start = BINARY_HEADER.size + first * self.record.size
+            end = BINARY_HEADER.size + min(self.count, first + BINARY_SCAN_RECORDS) * self.record.size
+            yield from self.record.iter_unpack(self.map[start:end])
+    
+    def fixed_at(self, index: int) -> tuple:
+        return self.record.unpack_from(self.map, BINARY_HEADER.size + index * self.record.size)
+    
+    def _text(self, offset: int, length: int) -> str:
+        start = self.heap_offset + offset
+        return str(self.map[start:start + length], 'utf-8')
+    
+    def decode(self, fields: tuple) -> Dict:
+        (task_id, rank, flags, due_ordinal, created, completed,
+         title_offset, title_length, description_offset, description_length,
+         extra_offset, extra_length) = fields[:12]
+        record = {
+            'id': task_id,
+            'title': self._text(title_offset, title_length),
+            'description': self._text(description_offset, description_length),
+            'priority': self.priorities[rank],
+            'due_date': date.fromordinal(due_ordinal).isoformat() if due_ordinal else None,
+            'completed': bool(flags & BINARY_COMPLETED),
+            'created_date': format_created_stamp(created) if created else None,
+            'completed_date': format_created_stamp(completed) if completed else None,
+        }
+        if flags & BINARY_REVISED:
+            modified, record['revision'] = fields[12:]
+            record['modified_date'] = format_created_stamp(modified) if modified else None
+        if flags & BINARY_EXTRA:
+            record.update(json.loads(self._text(extra_offset, extra_length)))
+        return record
+    
+    def iter_records(self) -> Iterator[Dict]:
+        for fields in self.iter_fixed():
+            yield self.decode(fields)
+
+
+class MappedTaskStore:
+    """Read-only store answering counts and pages from a binary task file
+    
+    Filtering and ordering only look at the fixed-width records; titles and
+    descriptions are decoded for the tasks actually returned.
+    """
+    
+    def __init__(self, binary_file: Optional[BinaryTaskFile], changes: Dict[int, Optional[Dict]]):
+        self.file = binary_file
+        # Journaled changes override the records with the same id
+        self.changes = changes
+        self.ranks = [priority_rank(name) for name in binary_file.priorities] if binary_file else []
+    
+    def _entries(self, filter_type: str, days: int) -> Iterator[tuple]:
+        # (display key, record index or journaled record) for every matching task
+        if self.file is not None:
+            for index, fields in enumerate(self.file.iter_fixed()):
+                if fields[0] in self.changes:
+                    continue
+                if fields[2] & BINARY_EXTRA:
+                    record = self.file.decode(fields)
+                    if record_matches(record, filter_type, days):
+                        yield Task.from_dict(record).display_key(), index
+                    continue
+                completed = bool(fields[2] & BINARY_COMPLETED)
+                if fields_match(completed, fields[3], filter_type, days):
+                    yield display_key(completed, self.ranks[fields[1]], fields[3], fields[0]), index
+        for record in self.changes.values():
+            if record is not None and record_matches(record, filter_type, days):
+                yield Task.from_dict(record).display_key(), record
+    
+    def _task(self, source) -> Task:
+        if isinstance(source, dict):
+            return Task.from_dict(source)
+        return Task.from_dict(self.file.decode(self.file.fixed_at(source)))
+    
+    def __len__(self) -> int:
+        return self.count()
+    
+    def __bool__(self) -> bool:
+        return next(self._entries("all", 7), None) is not None
+    
+    def __iter__(self):
+        return iter(self.filtered("all"))
+    
+    def filtered(self, filter_type: str, days: int = 7) -> List[Task]:
+        return [self._task(source) for _, source in self._entries(filter_type, days)]
+    
+    def count(self, filter_type: str = "all", days: int = 7) -> int:
+        return sum(1 for _ in self._entries(filter_type, days))
+    
+    def listing(self, filter_type: str = "all", days: int = 7,
+                limit: Optional[int] = None, offset: int = 0) -> List[Task]:
+        entries = self._entries(filter_type, days)
+        if limit is None:
+            chosen = sorted(entries, key=lambda entry: entry[0])[offset:]
+        else:
+            chosen = heapq.nsmallest(offset + limit, entries, key=lambda entry: entry[0])[offset:]
+        return [self._task(source) for _, source in chosen]
+
+
+class FileLock:
+    """Advisory lock shared by every process using the same task file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.fd: Optional[int] = None
+        self.depth = 0
+        self.exclusive = False
+        self._guard = threading.RLock()
+    
+    @contextmanager
+    def hold(self, exclusive: bool = True):
+        # Re-entrant: nested holds reuse the lock, upgrading it if needed
+        with self._guard:
+            if fcntl is not None:
+                if self.fd is None:
+                    self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if self.depth == 0 or (exclusive and not self.exclusive):
+                    fcntl.flock(self.fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                    self.exclusive = exclusive
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+                if self.depth == 0 and self.fd is not None:
+                    os.close(self.fd)
+                    self.fd = None
+                    self.exclusive = False
+
+
+def format_task(task: Task) -> str:
+    """The decorated multi-line block shown for a task in listings"""
+    status = "✅" if task.completed else "⏳"
+    priority_icons = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}
+    priority_icon = priority_icons.get(task.priority, '⚪')
+    
+    lines = ["", f"{status} [{task.id}] {priority_icon} {task.title}"]
+    if task.description:
+        lines.append(f"    📄 {task.description}")
+    if task.due_date:
+        due_status = " (OVERDUE!)" if task.is_overdue() else ""
+        lines.append(f"    📅 Due: {task.due_date}{due_status}")
+    lines.append(f"    📝 Created: {task.created_date}")
+    if task.completed and task.completed_date:
+        lines.append(f"    ✅ Completed: {task.completed_date}")
+    lines.append("-" * 60)
+    return "\n".join(lines) + "\n"
+
+
+class TaskRenderer:
+    """Formats tasks into a buffer that is written to stdout in large chunks
+    
+    Output is flushed as it fills up, so a reader such as `head` sees the first
+    tasks straight away and a closed pipe stops the listing early.
+    """
+    
+    TABLE_ROW = "{:>7}  {:<8}  {:<8}  {:<10}  {}\n"
+    
+    def __init__(self, output_format: str = "pretty"):
+        self.output_format = output_format
+        self.buffer = io.StringIO()
+        self.count = 0
+    
+    def __enter__(self) -> 'TaskRenderer':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+    
+    def write_tasks(self, tasks: Iterable[Task]):
+        for task in tasks:
+            self.write(task)
+    
+    def write(self, task: Task):
+        buffer = self.buffer
+        if self.output_format == "json":
+            buffer.write("[\n" if self.count == 0 else ",\n")
+            buffer.write(json.dumps(task.to_dict(), ensure_ascii=False))
+        elif self.output_format == "ndjson":
+            buffer.write(json.dumps(task.to_dict(), ensure_ascii=False))
+            buffer.write("\n")
+        elif self.output_format in ("table", "plain"):
+            if task.completed:
+                status = "done"
+            else:
+                status = "overdue" if task.is_overdue() else "pending"
+            if self.output_format == "plain":
+                buffer.write(f"{task.id}\t{status}\t{task.priority}\t{task.due_date or '-'}\t{task.title}\n")
+            else:
+                if self.count == 0:
+                    buffer.write(self.TABLE_ROW.format("ID", "STATUS", "PRIORITY", "DUE", "TITLE"))
+                buffer.write(self.TABLE_ROW.format(task.id, status, task.priority, task.due_date or "-", task.title))
+        else:
+            buffer.write(format_task(task))
+        self.count += 1
+        if buffer.tell() >= RENDER_BUFFER_CHARS:
+            self.flush()
+    
+    def flush(self):
+        sys.stdout.write(self.buffer.getvalue())
+        sys.stdout.flush()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+    
+    def close(self):
+        if self.output_format == "json":
+            self.buffer.write("[]\n" if self.count == 0 else "\n]\n")
+        self.flush()
+
+
+class TodoApp:
+    
+    def __init__(self, data_file: str = "tasks.json", backend: Optional[str] = None,
+                 autoload: bool = True):
+        self.data_file = data_file
+        if backend is None:
+            if data_file.lower().endswith(SQLITE_EXTENSIONS):
+                backend = 'sqlite'
+            elif data_file.lower().endswith(BINARY_EXTENSIONS):
+                backend = 'binary'
+            else:
+                backend = 'json'
+        self.backend = backend
+        self.journal_file = data_file + ".journal"
+        self.index_file = data_file + ".index"
+        self.stats_file = data_file + ".stats"
+        self.archive_dir = data_file + ".archive"
+        self.sync_file = data_file + ".sync"
+        self.history_file = data_file + ".history"
+        self.state_file = data_file + ".state"
+        self.archive_manifest = os.path.join(self.archive_dir, "index.json")
+        # Archived tasks are only read when asked for
+        self.include_archived = False
+        self.archive_after_days = ARCHIVE_AFTER_DAYS
+        # The search index is only saved next to the task file when asked for
+        self.save_index = False
+        self.tasks = TaskStore()
+        self.next_id = 1
+        # Always taken before _file_lock, see locked()
+        self._journal_lock = threading.RLock()
+        self._file_lock = FileLock(data_file + ".lock")
+        # Version stamp of the files this process last read or wrote, the journal
+        # length it has applied and the highest task id seen on disk
+        self._stamp: Optional[tuple] = None
+        self._journal_offset = 0
+        self._disk_max_id = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+        # True until every task has been loaded; partial stores must never be snapshotted
+        self.partial = True
+        # Journal entries held back by an open batch(), keyed by task id
+        self._batch_entries: Optional[Dict[int, Dict]] = None
+        # Interactive mode hands journal writes to a background writer, which
+        # waits for _store_lock so it never runs in the middle of a menu action
+        self._writer: Optional[threading.Thread] = None
+        self._unsaved: Dict[int, Dict] = {}
+        self._unsaved_steps: List[Dict] = []
+        self._unsaved_changed = threading.Condition()
+        self._last_change = 0.0
+        self._store_lock = threading.RLock()
+        # Set when the task list belongs to a Workspace; the menu can then switch lists
+        self.workspace: Optional['Workspace'] = None
+        self.switch_to: Optional[str] = None
+        if autoload:
+            self.load_tasks()
+        
+    def clear_screen(self):
+        os.system('cls' if os.name == 'nt' else 'clear')
+    
+    def print_header(self, title: str):
+        print("\n" + "=" * 60)
+        print(f"📝 {title.upper()}")
+        print("=" * 60)
+    
+    def load_tasks(self, filter_type: Optional[str] = None, days: int = 7):
+        if self.backend == 'sqlite':
+            # sqlite3.Error propagates: an empty stand-in store would take
+            # writes that never reach the database
+            self.tasks = SqliteTaskStore(self.data_file)
+            self.next_id = max(self.tasks.max_id(), self.archived_max_id()) + 1
+            self.partial = False
+            if self.include_archived:
+                self.tasks = TaskStore(list(self.tasks))
+                self.add_archived_tasks(filter_type, days)
+            return
+        
+        if filter_type is not None and self.backend == 'binary':
+            # Listings page through the mapped file instead of building every task
+            self.tasks = self.mapped_store()
+            self.partial = True
+            if self.include_archived:
+                self.add_archived_tasks(filter_type, days)
+            return
+        
+        # Only records matching filter_type become Task objects; the rest are
+        # just counted towards next_id.
+        if filter_type == "all":
+            filter_type = None
+        tasks = []
+        max_id = 0
+        try:
+            for record in self.iter_records():
+                max_id = max(max_id, record['id'])
+                if filter_type is None or record_matches(record, filter_type, days):
+                    tasks.append(Task.from_dict(record))
+        except (json.JSONDecodeError, FileNotFoundError, KeyError, ValueError, struct.error) as e:
+            print(f"⚠️  Error loading tasks: {e}")
+            tasks = []
+        
+        self.tasks = TaskStore(tasks)
+        self.partial = filter_type is not None
+        self.next_id = max(max_id, self.archived_max_id()) + 1
+        if self.include_archived:
+            self.add_archived_tasks(filter_type, days)
+            return
+        
+        # The saved index is only trusted if the data files have not changed
+        # since it was written, so it is loaded on first search rather than here.
+        self.tasks.load_text_index = lambda: TrigramIndex.load(self.index_file, self.storage_fingerprint())
+    
+    def read_archive_manifest(self) -> Dict:
+        try:
+            with open(self.archive_manifest, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {'segments': [], 'max_id': 0, 'tasks': 0}
+    
+    def archived_max_id(self) -> int:
+        # Archived ids stay taken so they are never handed out again
+        return self.read_archive_manifest()['max_id']
+    
+    def iter_archived_records(self) -> Iterator[Dict]:
+        import gzip
+        for segment in self.read_archive_manifest()['segments']:
+            with gzip.open(os.path.join(self.archive_dir, segment), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+    
+    def add_archived_tasks(self, filter_type: Optional[str] = None, days: int = 7):
+        # Live tasks win over archived copies; the combined store is never written back
+        self.partial = True
+        mapped = isinstance(self.tasks, MappedTaskStore)
+        try:
+            for record in self.iter_archived_records():
+                if filter_type is not None and not record_matches(record, filter_type, days):
+                    continue
+                if mapped:
+                    # The journaled delete of an archived task is the archival itself
+                    if self.tasks.changes.get(record['id']) is None:
+                        self.tasks.changes[record['id']] = record
+                elif self.tasks.get(record['id']) is None:
+                    self.tasks.put(Task.from_dict(record))
+        except (OSError, EOFError, json.JSONDecodeError, KeyError) as e:
+            print(f"⚠️  Error reading archived tasks: {e}")
+    
+    def archive_completed(self, days: int) -> int:
+        """Move tasks completed more than days ago into a new archive segment"""
+        import gzip
+        if self.partial:
+            # Only a fully loaded live task list can be archived from
+            return 0
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        
+        cutoff = parse_created_stamp((datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S'))
+        with self.locked():
+            if self.backend != 'sqlite':
+                self.sync_with_disk([])
+            old_tasks = [task for task in self.tasks.completed()
+                         if 0 < parse_created_stamp(task.completed_date) < cutoff]
+            if not old_tasks:
+                return 0
+            old_tasks.sort(key=lambda task: task.id)
+            
+            # The segment and manifest are in place before any task leaves the live list
+            manifest = self.read_archive_manifest()
+            segment = f"segment-{len(manifest['segments']) + 1:04d}.ndjson.gz"
+            try:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                temp_file = os.path.join(self.archive_dir, segment + ".tmp")
+                with gzip.open(temp_file, 'wt', encoding='utf-8') as f:
+                    f.write("".join(json.dumps(task.to_dict(), ensure_ascii=False) + "\n"
+                                    for task in old_tasks))
+                os.replace(temp_file, os.path.join(self.archive_dir, segment))
+                
+                manifest['segments'].append(segment)
+                manifest['max_id'] = max(manifest['max_id'], old_tasks[-1].id)
+                manifest['tasks'] = manifest.get('tasks', 0) + len(old_tasks)
+                temp_file = self.archive_manifest + ".tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, indent=2)
+                os.replace(temp_file, self.archive_manifest)
+            except OSError as e:
+                print(f"❌ Error archiving tasks: {e}")
+                return 0
+            
+            # Archived tasks stay recoverable from their segment, so this is no undo step
+            with self.batch(history=False):
+                for task in old_tasks:
+                    self.tasks.remove(task)
+                self.record_changes('delete', old_tasks)
+        return len(old_tasks)
+    
+    def search_archive(self, query: str) -> List[Task]:
+        # Archives have no index, so they are scanned one segment at a time
+        matches = []
+        for record in self.iter_archived_records():
+            if query in (record.get('title') or '').lower() or query in (record.get('description') or '').lower():
+                matches.append(Task.from_dict(record))
+        return matches
+    
+    def storage_fingerprint(self) -> List:
+        fingerprint = []
+        for path in (self.data_file, self.journal_file):
+            try:
+                stat = os.stat(path)
+                fingerprint.append([stat.st_size, stat.st_mtime_ns])
+            except OSError:
+                fingerprint.append(None)
+        return fingerprint
+    
+    def save_stats_summary(self):
+        if self.backend == 'sqlite' or self.partial:
+            return
+        self.write_stats_summary(self.tasks.aggregates())
+    
+    def write_stats_summary(self, aggregates: Dict):
+        summary = {'fingerprint': self.storage_fingerprint(), 'aggregates': aggregates}
+        try:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️  Error saving statistics: {e}")
+    
+    def read_stats_aggregates(self, fingerprint: List) -> Optional[Dict]:
+        # The saved aggregates, if they were written for the files as of fingerprint
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if summary.get('fingerprint') != fingerprint:
+            return None
+        return summary['aggregates']
+    
+    def count_added_task(self, fingerprint: List, task: Task):
+        # Carries a summary that was current before task was appended over to
+        # the new journal, so --stats after --add needs no full load
+        aggregates = self.read_stats_aggregates(fingerprint)
+        if aggregates is None:
+            return
+        aggregates['total'] += 1
+        by_priority = aggregates['pending_by_priority']
+        by_priority[task.priority] = by_priority.get(task.priority, 0) + 1
+        if task.due_ordinal:
+            aggregates['pending_by_due'][task.due_date] = aggregates['pending_by_due'].get(task.due_date, 0) + 1
+        entry = {'title': task.title, 'created_date': task.created_date}
+        aggregates['newest'] = entry
+        aggregates['oldest'] = aggregates['oldest'] or entry
+        self.write_stats_summary(aggregates)
+    
+    def list_statistics(self) -> Dict:
+        """Statistics from the saved summary, loading the tasks only when it is stale"""
+        if self.backend == 'sqlite':
+            self.load_tasks()
+            return self.tasks.statistics()
+        stats = self.load_stats_summary()
+        if stats is None:
+            self.load_tasks()
+            stats = self.tasks.statistics()
+            self.save_stats_summary()
+        return stats
+    
+    def load_stats_summary(self) -> Optional[Dict]:
+        if self.backend == 'sqlite':
+            return None
+        aggregates = self.read_stats_aggregates(self.storage_fingerprint())
+        return summarize_aggregates(aggregates) if aggregates is not None else None
+    
+    def search_unloaded(self, query: str) -> List[Task]:
+        """Search without loading the task list
+        
+        A current saved search index rules files out without reading them and
+        otherwise limits which streamed records are checked.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+        if self.backend == 'sqlite':
+            store = SqliteTaskStore(self.data_file)
+            try:
+                return store.search(query)
+            finally:
+                store.close()
+        
+        text_index = TrigramIndex.load(self.index_file, self.storage_fingerprint())
+        candidate_ids = text_index.candidates(terms) if text_index else None
+        if candidate_ids is not None and not candidate_ids:
+            return []
+        matches = []
+        for record in self.iter_records():
+            if candidate_ids is not None and record['id'] not in candidate_ids:
+                continue
+            title, description = record['title'].lower(), (record.get('description') or '').lower()
+            if all(term in title or term in description for term in terms):
+                matches.append(Task.from_dict(record))
+        return matches
+    
+    def save_search_index(self):
+        text_index = getattr(self.tasks, 'text_index', None)
+        if not self.save_index or text_index is None or not text_index.dirty or self.partial:
+            return
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        try:
+            text_index.save(self.index_file, self.storage_fingerprint())
+        except OSError as e:
+            print(f"⚠️  Error saving search index: {e}")
+    
+    def read_journal(self, journal_files: Optional[tuple] = None) -> Dict[int, Optional[Dict]]:
+        # Latest journaled record per task id, None for deleted tasks. A journal
+        # left behind by an interrupted compaction is read first; replaying it
+        # over a snapshot that already contains it is harmless.
+        changes: Dict[int, Optional[Dict]] = {}
+        for journal_file in journal_files or (self.journal_file + ".compacting", self.journal_file):
+            if not os.path.exists(journal_file):
+                continue
+            try:
+                with open(journal_file, 'r', encoding='utf-8') as f:
+                    for number, line in enumerate(f, 1):
+                        if not line.endswith("\n"):
+                            # A torn final record from a crash mid-append
+                            break
+                        if not line.strip():
+                            continue
+                        entry = parse_journal_line(line)
+                        if entry is None:
+                            print(f"⚠️  Skipping unreadable line {number} of '{journal_file}'")
+                            continue
+                        if entry['op'] == 'put':
+                            changes[entry['task']['id']] = entry['task']
+                        elif entry['op'] == 'delete':
+                            changes[entry['id']] = None
+            except (OSError, KeyError) as e:
+                print(f"⚠️  Error replaying journal: {e}")
+        return changes
+    
+    def iter_records(self) -> Iterator[Dict]:
+        # Current task records: the snapshot streamed from disk with journaled
+        # changes applied in place, then tasks that exist only in the journal.
+        with self._file_lock.hold(exclusive=False):
+            stamp, journal_size = self.storage_stamp()
+            max_id = 0
+            for record in self.merge_journal(self.read_journal()):
+                max_id = max(max_id, record['id'])
+                yield record
+            # Only a complete pass tells us what is on disk
+            max_id = max(max_id, self.archived_max_id())
+            self._stamp, self._journal_offset, self._disk_max_id = stamp, journal_size, max_id
+            self.save_disk_state()
+    
+    def merge_journal(self, changes: Dict[int, Optional[Dict]], progress: bool = True) -> Iterator[Dict]:
+        # The snapshot with changes applied in place, then the tasks only in changes
+        if os.path.exists(self.data_file):
+            for record in self.iter_snapshot(progress):
+                if record['id'] in changes:
+                    record = changes.pop(record['id'])
+                    if record is None:
+                        continue
+                yield record
+        for record in changes.values():
+            if record is not None:
+                yield record
+    
+    def iter_snapshot(self, progress: bool = True) -> Iterator[Dict]:
+        if self.backend == 'binary':
+            with BinaryTaskFile(self.data_file) as binary_file:
+                yield from binary_file.iter_records()
+            return
+        
+        total_bytes = os.path.getsize(self.data_file)
+        on_progress = None
+        if progress and total_bytes >= LOAD_PROGRESS_BYTES:
+            on_progress = lambda done: self.report_load_progress(done, total_bytes)
+        yield from iter_json_array(self.data_file, on_progress)
+        if on_progress:
+            print(file=sys.stderr)
+    
+    def mapped_store(self) -> MappedTaskStore:
+        with self._file_lock.hold(exclusive=False):
+            # The mapping keeps this snapshot readable even if it is replaced later
+            binary_file = BinaryTaskFile(self.data_file) if os.path.exists(self.data_file) else None
+            return MappedTaskStore(binary_file, self.read_journal())
+    
+    def storage_stamp(self) -> tuple:
+        # (snapshot, interrupted compaction, journal) identities plus the journal
+        # length up to its last complete record
+        stamp = []
+        for path in (self.data_file, self.journal_file + ".compacting", self.journal_file):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                stamp.append(None)
+        journal = stamp.pop()
+        if journal is None:
+            return (stamp[0], stamp[1], None), 0
+        try:
+            journal_size = complete_lines_size(self.journal_file, journal[1])
+        except OSError:
+            journal_size = journal[1]
+        return (stamp[0], stamp[1], journal[0]), journal_size
+    
+    def save_disk_state(self, state: Optional[tuple] = None):
+        # What this process knows about the files, or the (stamp, journal offset,
+        # max id) given, so the next one can append to the journal without
+        # reading the task file first
+        stamp, journal_offset, max_id = state or (self._stamp, self._journal_offset, self._disk_max_id)
+        temp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'stamp': stamp, 'journal_offset': journal_offset, 'max_id': max_id}, f)
+            os.replace(temp_file, self.state_file)
+        except OSError:
+            pass
+    
+    def restore_disk_state(self) -> bool:
+        """Pick up the saved disk state instead of scanning for the next id
+        
+        Anything written since is caught by sync_with_disk(): journal appends are
+        read from the saved offset and any other change forces a full pass.
+        """
+        if self.backend == 'sqlite':
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            data, compacting, journal = state['stamp']
+            stamp = (tuple(data) if data else None, tuple(compacting) if compacting else None, journal)
+            journal_offset, max_id = state['journal_offset'], state['max_id']
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self._stamp, self._journal_offset, self._disk_max_id = stamp, journal_offset, max_id
+        self.next_id = max(self.next_id, max_id + 1)
+        return True
+    
+    def _mark_synced(self):
+        self._stamp, self._journal_offset = self.storage_stamp()
+    
+    def _read_journal_tail(self) -> List[Dict]:
+        entries = []
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            f.seek(self._journal_offset)
+            for line in iter(f.readline, ''):
+                if not line.endswith("\n"):
+                    break
+                self._journal_offset = f.tell()
+                entry = parse_journal_line(line)
+                if entry is None:
+                    print(f"⚠️  Skipping an unreadable record before byte {self._journal_offset} "
+                          f"of '{self.journal_file}'")
+                    continue
+                entries.append(entry)
+        return entries
+    
+    def sync_with_disk(self, pending: List[Dict], steps: Iterable[Dict] = ()) -> Dict[int, int]:
+        """Merge changes other processes made since we last read the task file
+        
+        Must be called with the exclusive file lock held. Pending entries about to be
+        written are re-applied on top, and tasks created here are renumbered past
+        any ids another process has taken in the meantime, together with the ids
+        of new tasks in the undo steps about to be saved. Returns the new id of
+        every renumbered task.
+        """
+        stamp, journal_size = self.storage_stamp()
+        if self._stamp == stamp and self._journal_offset == journal_size:
+            return {}
+        
+        known_max_id = self._disk_max_id
+        next_id_before = self.next_id
+        new_entries = [entry for entry in pending
+                       if entry['op'] == 'put' and entry['task']['id'] > known_max_id]
+        for entry in new_entries:
+            task = self.tasks.get(entry['task']['id'])
+            if task is not None:
+                self.tasks.remove(task)
+        
+        old = self._stamp
+        appended_only = (old is not None and old[:2] == stamp[:2]
+                         and (old[2] == stamp[2] or (old[2] is None and self._journal_offset == 0))
+                         and journal_size >= self._journal_offset)
+        if appended_only:
+            for entry in self._read_journal_tail():
+                if entry['op'] == 'put':
+                    self._disk_max_id = max(self._disk_max_id, entry['task']['id'])
+                if self.partial:
+                    continue
+                if entry['op'] == 'put':
+                    self.tasks.put(Task.from_dict(entry['task']))
+                elif entry['op'] == 'delete':
+                    task = self.tasks.get(entry['id'])
+                    if task:
+                        self.tasks.remove(task)
+            self._stamp = stamp
+        elif self.partial:
+            for _ in self.iter_records():
+                pass
+        else:
+            self.load_tasks()
+        
+        # Our own tasks move past every id now on disk. Tasks created and deleted
+        # again before they were written only live on in undo steps.
+        next_id = self._disk_max_id + 1
+        new_ids = {entry['task']['id'] for entry in new_entries}
+        for step in steps:
+            new_ids.update(task_id for task_id in map(journal_entry_id, step['undo'] + step['redo'])
+                           if task_id > known_max_id)
+        renumbered = {}
+        if new_ids and min(new_ids) < next_id:
+            renumbered = {task_id: next_id + position for position, task_id in enumerate(sorted(new_ids))}
+            next_id += len(new_ids)
+            for entry in new_entries:
+                entry['task'] = dict(entry['task'], id=renumbered[entry['task']['id']])
+        for entry in pending:
+            if entry['op'] == 'put':
+                self.tasks.put(Task.from_dict(entry['task']))
+            else:
+                task = self.tasks.get(entry['id'])
+                if task:
+                    self.tasks.remove(task)
+        if new_ids:
+            next_id = max(next_id, max(new_ids) + 1)
+        self.next_id = max(next_id_before, next_id)
+        return renumbered
+    
+    def report_load_progress(self, chars_read: int, total_bytes: int):
+        # Characters read only approximate bytes for non-ASCII files
+        percent = min(100, chars_read * 100 // total_bytes)
+        print(f"\r⏳ Loading tasks... {percent}% ({chars_read // (1024 * 1024)} MB)",
+              end='', file=sys.stderr, flush=True)
+    
+    def scan_next_id(self):
+        if self.backend == 'sqlite':
+            self.load_tasks()
+            return
+        max_id = 0
+        for record in self.iter_records():
+            max_id = max(max_id, record['id'])
+        self.next_id = max(max_id, self.archived_max_id()) + 1
+    
+    def count_tasks(self, filter_type: str = "all", days: int = 7) -> int:
+        if self.backend == 'sqlite' or self.include_archived:
+            self.load_tasks(filter_type, days)
+            return self.tasks.count(filter_type, days)
+        if self.backend == 'binary':
+            return self.mapped_store().count(filter_type, days)
+        return sum(1 for record in self.iter_records() if record_matches(record, filter_type, days))
+    
+    def record_change(self, op: str, task: Task):
+        self.record_changes(op, [task])
+    
+    def record_changes(self, op: str, tasks: List[Task]):
+        if self.backend == 'sqlite':
+            # SqliteTaskStore writes every mutation through to the database
+            return
+        
+        if op == 'put':
+            entries = [{'op': 'put', 'task': task.to_dict()} for task in tasks]
+        else:
+            entries = [{'op': 'delete', 'id': task.id} for task in tasks]
+        
+        if self._batch_entries is not None:
+            # Entries carry the full task state, so only the last one per id matters
+            for entry in entries:
+                self._batch_entries[journal_entry_id(entry)] = entry
+            return
+        
+        self.write_entries(entries)
+    
+    def write_entries(self, entries: List[Dict], step: Optional[Dict] = None):
+        # The undo step, if any, is saved with the entries once their ids are final
+        steps = [step] if step else []
+        if self._writer is None:
+            self.append_journal(entries, steps)
+            return
+        
+        with self._unsaved_changed:
+            self._unsaved_steps.extend(steps)
+            for entry in entries:
+                if entry['op'] == 'put':
+                    self._unsaved[entry['task']['id']] = entry
+                elif entry['id'] > self._disk_max_id:
+                    # A task created and deleted before it was ever written
+                    self._unsaved.pop(entry['id'], None)
+                else:
+                    self._unsaved[entry['id']] = entry
+            self._last_change = time.monotonic()
+            self._unsaved_changed.notify()
+    
+    def unsaved_changes(self) -> int:
+        with self._unsaved_changed:
+            return len(self._unsaved)
+    
+    def flush_changes(self):
+        with self._store_lock:
+            with self._unsaved_changed:
+                entries = list(self._unsaved.values())
+                steps, self._unsaved_steps = self._unsaved_steps, []
+                self._unsaved.clear()
+            self.append_journal(entries, steps)
+    
+    def start_background_writer(self):
+        if self.backend == 'sqlite' or self._writer is not None:
+            return
+        self._writer = threading.Thread(target=self._write_when_quiet, daemon=True)
+        self._writer.start()
+    
+    def stop_background_writer(self):
+        """Stop the background writer and save whatever it has not written yet"""
+        # Cleared under the condition, so the writer cannot miss the notify
+        # between checking _writer and starting to wait
+        with self._unsaved_changed:
+            writer, self._writer = self._writer, None
+            self._unsaved_changed.notify()
+        if writer is not None:
+            writer.join()
+        self.flush_changes()
+    
+    def _write_when_quiet(self):
+        while True:
+            with self._unsaved_changed:
+                if self._writer is None:
+                    return
+                if not self._unsaved:
+                    self._unsaved_changed.wait()
+                    continue
+                quiet_for = time.monotonic() - self._last_change
+                if quiet_for < SAVE_DELAY_SECONDS:
+                    self._unsaved_changed.wait(SAVE_DELAY_SECONDS - quiet_for)
+                    continue
+            # Retry rather than block, so a stop from inside a menu action can join us
+            if self._store_lock.acquire(timeout=0.1):
+                try:
+                    self.flush_changes()
+                finally:
+                    self._store_lock.release()
+    
+    @contextmanager
+    def locked(self):
+        """Hold the journal lock, then the file lock
+        
+        Every writer takes them in this order, so the compaction thread can never
+        wait on a lock the foreground holds while the foreground waits on it.
+        """
+        with self._journal_lock, self._file_lock.hold():
+            yield
+    
+    def append_journal(self, entries: List[Dict], steps: Iterable[Dict] = ()):
+        if self.backend == 'sqlite':
+            # SQLite writes changes through and never renumbers them
+            for step in steps:
+                self.record_history(step)
+            return
+        if not entries and not steps:
+            return
+        try:
+            with self.locked():
+                renumbered = self.sync_with_disk(entries, steps)
+                with open(self.journal_file, 'a+', encoding='utf-8') as f:
+                    if f.tell() > self._journal_offset:
+                        # Drop a torn record left by a crash so later entries stay readable
+                        f.truncate(self._journal_offset)
+                    f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+                    journal_size = f.tell()
+                self._mark_synced()
+                for entry in entries:
+                    if entry['op'] == 'put':
+                        self._disk_max_id = max(self._disk_max_id, entry['task']['id'])
+                self.save_disk_state()
+                # Saved only now, so the steps refer to the ids actually written
+                for step in steps:
+                    self.record_history(step, renumbered)
+        except Exception as e:
+            print(f"❌ Error saving tasks: {e}")
+            return
+        
+        if journal_size >= JOURNAL_COMPACT_BYTES:
+            self.compact_in_background()
+        self.save_stats_summary()
+    
+    @contextmanager
+    def batch(self, history: bool = True):
+        """Group mutations so they are persisted once, or not at all on error
+        
+        With history on, the batch is saved as one step that --undo can revert.
+        """
+        if self._batch_entries is not None:
+            # Nested batches join the outermost one
+            yield self
+            return
+        
+        self._batch_entries = {}
+        self.tasks.begin()
+        next_id = self.next_id
+        try:
+            yield self
+        except BaseException:
+            self._batch_entries = None
+            self.tasks.rollback()
+            self.next_id = next_id
+            raise
+        entries, self._batch_entries = list(self._batch_entries.values()), None
+        previous = self.tasks.commit()
+        self.write_entries(entries, self.history_step(previous) if history else None)
+    
+    def read_history(self) -> Dict:
+        # The undo and redo stacks as [offset, length] of each step in the history log
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+            if 'generation' in history:
+                return history
+        except (OSError, json.JSONDecodeError):
+            pass
+        return {'generation': 0, 'undo': [], 'redo': []}
+    
+    def write_history(self, history: Dict) -> bool:
+        temp_file = self.history_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(history, f)
+            os.replace(temp_file, self.history_file)
+            return True
+        except OSError as e:
+            print(f"⚠️  Error saving undo history: {e}")
+            return False
+    
+    def history_log(self, generation: int) -> str:
+        return f"{self.history_file}.{generation}.log"
+    
+    def read_history_step(self, generation: int, position: List[int]) -> Dict:
+        offset, length = position
+        with open(self.history_log(generation), 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+    
+    def history_step(self, previous: Dict[int, Optional[Task]]) -> Optional[Dict]:
+        # A step holds journal entries for the touched tasks only, before and after
+        step = {'undo': [], 'redo': []}
+        for task_id, before in sorted(previous.items()):
+            after = self.tasks.get(task_id)
+            if before is None and after is None:
+                continue
+            for key, task in (('undo', before), ('redo', after)):
+                step[key].append({'op': 'put', 'task': task.to_dict()} if task else {'op': 'delete', 'id': task_id})
+        return step if step['undo'] else None
+    
+    def record_history(self, step: Dict, renumbered: Optional[Dict[int, int]] = None):
+        if renumbered:
+            step = {key: [renumber_entry(entry, renumbered) for entry in entries]
+                    for key, entries in step.items()}
+        line = (json.dumps(step, ensure_ascii=False) + "\n").encode('utf-8')
+        
+        # Steps are appended to the log; only the small stack index is rewritten
+        with self._file_lock.hold():
+            history = self.read_history()
+            try:
+                with open(self.history_log(history['generation']), 'ab') as f:
+                    offset = f.tell()
+                    f.write(line)
+            except OSError as e:
+                print(f"⚠️  Error saving undo history: {e}")
+                return
+            history['undo'] = history['undo'][-(UNDO_HISTORY_STEPS - 1):] + [[offset, len(line)]]
+            history['redo'] = []
+            
+            log_size = offset + len(line)
+            if log_size >= HISTORY_COMPACT_BYTES and log_size > 2 * sum(length for _, length in history['undo']):
+                self.compact_history(history)
+            else:
+                self.write_history(history)
+    
+    def compact_history(self, history: Dict):
+        """Save history with its live steps copied into the next generation's log
+        
+        The old log is removed once the index points at the new one, so a crash
+        in between leaves the history readable.
+        """
+        old_log = self.history_log(history['generation'])
+        compacted = {'generation': history['generation'] + 1, 'undo': [], 'redo': []}
+        try:
+            with open(old_log, 'rb') as source, open(self.history_log(compacted['generation']), 'wb') as target:
+                for key in ('undo', 'redo'):
+                    for offset, length in history[key]:
+                        source.seek(offset)
+                        compacted[key].append([target.tell(), length])
+                        target.write(source.read(length))
+        except OSError as e:
+            print(f"⚠️  Error compacting undo history: {e}")
+            self.write_history(history)
+            return
+        if self.write_history(compacted):
+            os.remove(old_log)
+    
+    def undo(self, steps: int = 1, redo: bool = False) -> int:
+        """Revert (or with redo, reapply) up to steps changes; returns how many were"""
+        source, target = ('redo', 'undo') if redo else ('undo', 'redo')
+        applied = 0
+        # Changes still waiting for the background writer hold the latest steps
+        self.flush_changes()
+        with self.locked():
+            history = self.read_history()
+            with self.batch(history=False):
+                while applied < steps and history[source]:
+                    try:
+                        step = self.read_history_step(history['generation'], history[source][-1])
+                    except (OSError, ValueError) as e:
+                        print(f"⚠️  Error reading undo history: {e}")
+                        break
+                    self.apply_history_entries(step[source])
+                    history[target].append(history[source].pop())
+                    applied += 1
+            if applied:
+                self.write_history(history)
+        return applied
+    
+    def apply_history_entries(self, entries: List[Dict]):
+        modified_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for entry in entries:
+            if entry['op'] == 'put':
+                task = Task.from_dict(entry['task'])
+                current = self.tasks.get(task.id)
+                # A fresh revision, so a sync sees the undo as the latest change
+                task.revision = max(task.revision, current.revision if current else 0) + 1
+                task.modified_date = modified_date
+                self.tasks.put(task)
+                self.next_id = max(self.next_id, task.id + 1)
+                self.record_change('put', task)
+            else:
+                current = self.tasks.get(entry['id'])
+                if current is not None:
+                    self.tasks.remove(current)
+                    self.record_change('delete', current)
+    
+    def compact_in_background(self):
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+        
+        compacting_file = self.journal_file + ".compacting"
+        with self.locked():
+            # Another process may already be compacting
+            if os.path.exists(compacting_file) or not os.path.exists(self.journal_file):
+                return
+            self.sync_with_disk([])
+            # Everything up to this point is captured by the snapshot; later
+            # changes go to a fresh journal while the snapshot is written. Without
+            # every task in memory, it is streamed from the files instead.
+            snapshot = None if self.partial else [task.to_dict() for task in self.tasks]
+            os.replace(self.journal_file, compacting_file)
+            self._mark_synced()
+            compacting_stamp = self._stamp[1]
+        
+        self._compaction_thread = threading.Thread(
+            target=self._write_compacted_snapshot,
+            args=(snapshot, compacting_file, compacting_stamp),
+            name="todo-compaction"
+        )
+        self._compaction_thread.start()
+    
+    def _write_compacted_snapshot(self, snapshot: Optional[List[Dict]], compacting_file: str,
+                                  compacting_stamp: tuple):
+        if snapshot is None:
+            snapshot = self.merge_journal(self.read_journal((compacting_file,)), progress=False)
+        max_id = 0
+        
+        def records() -> Iterator[Dict]:
+            nonlocal max_id
+            for record in snapshot:
+                max_id = max(max_id, record['id'])
+                yield record
+        
+        temp_file = self.write_temp_snapshot(records())
+        if temp_file is None:
+            return
+        with self.locked():
+            # A full save by another process makes this snapshot obsolete
+            if self.storage_stamp()[0][1] != compacting_stamp:
+                os.remove(temp_file)
+                return
+            in_sync = self._stamp is not None and self._stamp[:2] == self.storage_stamp()[0][:2]
+            fingerprint = self.storage_fingerprint()
+            os.replace(temp_file, self.data_file)
+            os.remove(compacting_file)
+            # The new snapshot holds the same tasks, so a current summary stays current
+            aggregates = self.read_stats_aggregates(fingerprint)
+            if aggregates is not None:
+                self.write_stats_summary(aggregates)
+            stamp, journal_size = self.storage_stamp()
+            if in_sync:
+                self._stamp = stamp[:2] + self._stamp[2:]
+            # Saved for the next one-shot --add, which would otherwise find the
+            # state stale and scan the whole new snapshot
+            max_id = max(max_id, max(self.read_journal((self.journal_file,)), default=0), self.archived_max_id())
+            self.save_disk_state((stamp, journal_size, max_id))
+    
+    def write_snapshot(self, snapshot: Iterable[Dict]) -> bool:
+        """Replace the task file with snapshot, which supersedes the journals
+        
+        Must be called with the file lock held.
+        """
+        max_id = 0
+        
+        def records() -> Iterator[Dict]:
+            nonlocal max_id
+            for record in snapshot:
+                max_id = max(max_id, record['id'])
+                yield record
+        
+        temp_file = self.write_temp_snapshot(records())
+        if temp_file is None:
+            return False
+        try:
+            os.replace(temp_file, self.data_file)
+            self.remove_journals()
+        except OSError as e:
+            print(f"❌ Error saving tasks: {e}")
+            return False
+        # The next one-shot --add can then append without scanning the new file
+        self.save_disk_state((self.storage_stamp()[0], 0, max(max_id, self.archived_max_id())))
+        return True
+    
+    def write_temp_snapshot(self, snapshot: Iterable[Dict]) -> Optional[str]:
+        # Streams the same layout as json.dump(snapshot, indent=2) in buffered chunks
+        # to a temporary file private to this process
+        temp_file = f"{self.data_file}.{os.getpid()}.tmp"
+        try:
+            if self.backend == 'binary':
+                write_binary_tasks(temp_file, snapshot)
+                return temp_file
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                separator = "[\n  "
+                chunk = []
+                for record in snapshot:
+                    chunk.append(separator + json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+                    separator = ",\n  "
+                    if len(chunk) >= SNAPSHOT_WRITE_BATCH:
+                        f.write("".join(chunk))
+                        chunk.clear()
+                f.write("".join(chunk))
+                f.write("[]" if separator == "[\n  " else "\n]")
+            return temp_file
+        except Exception as e:
+            print(f"❌ Error saving tasks: {e}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            return None
+    
+    def save_tasks(self):
+        if self.backend == 'sqlite':
+            # Every mutation has already been committed by SqliteTaskStore
+            return
+        
+        if self.partial:
+            print("❌ Error saving tasks: only part of the task list is loaded")
+            return
+        
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        
+        with self.locked():
+            self.sync_with_disk([])
+            if self.write_snapshot(task.to_dict() for task in self.tasks):
+                self._mark_synced()
+        self.save_stats_summary()
+    
+    def remove_journals(self):
+        for journal_file in (self.journal_file, self.journal_file + ".compacting"):
+            if os.path.exists(journal_file):
+                os.remove(journal_file)
+    
+    def import_tasks(self, path: str, file_format: str) -> int:
+        import csv
+        created_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        started = time.time()
+        progress = {'imported': 0}
+        problems = {'untitled': 0, 'due_date': 0, 'priority': 0}
+        
+        def imported_records(first_id: int) -> Iterator[Dict]:
+            task_id = first_id
+            for row in iter_import_rows(path, file_format):
+                record = import_row_to_record(row, task_id, created_date, problems)
+                if record is None:
+                    continue
+                task_id += 1
+                progress['imported'] += 1
+                if progress['imported'] % (IMPORT_BATCH_SIZE * 5) == 0:
+                    rate = progress['imported'] / max(time.time() - started, 1e-6)
+                    print(f"⏳ Imported {progress['imported']} task(s) ({rate:,.0f} tasks/s)", file=sys.stderr)
+                yield record
+            self.next_id = task_id
+        
+        try:
+            if self.backend == 'sqlite':
+                self.load_tasks()
+                chunk = []
+                for record in imported_records(self.next_id):
+                    chunk.append(Task.from_dict(record))
+                    if len(chunk) >= IMPORT_BATCH_SIZE:
+                        self.tasks.put_many(chunk)
+                        chunk = []
+                self.tasks.put_many(chunk)
+            else:
+                # Existing tasks and imported rows are streamed into one new snapshot
+                def merged_records() -> Iterator[Dict]:
+                    max_id = 0
+                    for record in self.iter_records():
+                        max_id = max(max_id, record['id'])
+                        yield record
+                    yield from imported_records(max_id + 1)
+                
+                if self._compaction_thread:
+                    self._compaction_thread.join()
+                with self.locked():
+                    if not self.write_snapshot(merged_records()):
+                        return 0
+                    self._mark_synced()
+                    self._disk_max_id = self.next_id - 1
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"❌ Error importing tasks: {e}")
+            return 0
+        
+        elapsed = max(time.time() - started, 1e-6)
+        print(f"✅ Imported {progress['imported']} task(s) in {elapsed:.1f}s "
+              f"({progress['imported'] / elapsed:,.0f} tasks/s)")
+        if problems['untitled']:
+            print(f"⚠️  Skipped {problems['untitled']} row(s) without a title")
+        if problems['due_date']:
+            print(f"⚠️  {problems['due_date']} task(s) had an invalid due date and were imported without one")
+        if problems['priority']:
+            print(f"⚠️  {problems['priority']} task(s) had an unknown priority and were imported as medium")
+        return progress['imported']
+    
+    def convert_tasks(self, target_file: str) -> int:
+        """Write every task into target_file, as binary for .tdb files and JSON otherwise"""
+        target = TodoApp(target_file, autoload=False)
+        if target.backend == 'sqlite':
+            print("❌ Use --migrate to copy tasks into a SQLite file")
+            return 0
+        
+        count = 0
+        
+        def records() -> Iterator[Dict]:
+            nonlocal count
+            for record in self.iter_records():
+                count += 1
+                yield record
+        
+        with target.locked():
+            if not target.write_snapshot(records()):
+                return 0
+        return count
+    
+    def read_sync_state(self) -> Dict:
+        try:
+            with open(self.sync_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == SYNC_STATE_VERSION:
+                return state
+        except (OSError, json.JSONDecodeError):
+            pass
+        return {'version': SYNC_STATE_VERSION, 'peers': {}}
+    
+    def write_sync_state(self, state: Dict):
+        temp_file = self.sync_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            # json.dumps uses the C encoder; json.dump would encode the baseline in Python
+            f.write(json.dumps(state, separators=(',', ':')))
+        os.replace(temp_file, self.sync_file)
+    
+    def archived_ids(self) -> Set[int]:
+        if not os.path.exists(self.archive_manifest):
+            return set()
+        return {record['id'] for record in self.iter_archived_records()}
+    
+    def changes_since(self, point: Optional[Dict],
+                      baseline: Optional[Dict[int, int]]) -> Tuple[Dict[int, Optional[Dict]], int]:
+        """Records changed since a sync point (None for deleted ids) and the highest id
+        
+        Without a baseline every task counts as changed. When only the journal has
+        grown since the sync point, just the appended entries are read; SQLite
+        only reads new tasks and those modified since the sync started.
+        """
+        changes: Dict[int, Optional[Dict]] = {}
+        stamp, journal_size = self.storage_stamp()
+        stamp = json.loads(json.dumps(stamp))
+        if (baseline is not None and self.backend != 'sqlite'
+                and stamp[:2] == point['stamp'][:2] and journal_size >= point['journal_offset']
+                and (stamp[2] == point['stamp'][2] or (point['stamp'][2] is None and point['journal_offset'] == 0))):
+            max_id = point['max_id']
+            if journal_size > point['journal_offset']:
+                self._journal_offset = point['journal_offset']
+                for entry in self._read_journal_tail():
+                    if entry['op'] == 'put':
+                        changes[entry['task']['id']] = entry['task']
+                        max_id = max(max_id, entry['task']['id'])
+                    elif entry['op'] == 'delete':
+                        changes[entry['id']] = None
+            # Entries that undo themselves, or only rewrite a task, are no change
+            for task_id, record in list(changes.items()):
+                if (record is None and task_id not in baseline) or (
+                        record is not None and baseline.get(task_id) == record_fingerprint(record)):
+                    del changes[task_id]
+            return changes, max_id
+        
+        if self.backend == 'sqlite':
+            store = self.tasks if isinstance(self.tasks, SqliteTaskStore) else SqliteTaskStore(self.data_file)
+            max_id = max(store.max_id(), self.archived_max_id())
+            if baseline is not None and point.get('since'):
+                ids = store.ids()
+                for task_id in baseline.keys() - ids:
+                    changes[task_id] = None
+                for task_id in ids - baseline.keys():
+                    changes[task_id] = store.get(task_id).to_dict()
+                for record in store.iter_modified_records(point['since']):
+                    if baseline.get(record['id']) != record_fingerprint(record):
+                        changes[record['id']] = record
+                return changes, max_id
+            records = store.iter_records()
+        else:
+            records = self.iter_records()
+        seen = set()
+        max_id = 0
+        for record in records:
+            task_id = record['id']
+            seen.add(task_id)
+            max_id = max(max_id, task_id)
+            if baseline is None or baseline.get(task_id) != record_fingerprint(record):
+                changes[task_id] = record
+        if baseline is not None:
+            for task_id in baseline.keys() - seen:
+                changes[task_id] = None
+        return changes, max(max_id, self.archived_max_id())
+    
+    def apply_sync_changes(self, records: List[Dict], deleted: List[int], max_id: int):
+        # Called with the file lock held and the other side's changes already merged
+        if self.backend == 'sqlite':
+            store = self.tasks if isinstance(self.tasks, SqliteTaskStore) else SqliteTaskStore(self.data_file)
+            store.begin()
+            try:
+                store.put_many([Task.from_dict(record) for record in records])
+                for task_id in deleted:
+                    store.remove(Task(task_id, ""))
+            except BaseException:
+                store.rollback()
+                raise
+            store.commit()
+            return
+        
+        # Nothing on disk changed since changes_since() read it, so no merge is needed
+        self._stamp, self._journal_offset = self.storage_stamp()
+        self._disk_max_id = max_id
+        self.append_journal([{'op': 'put', 'task': record} for record in records]
+                            + [{'op': 'delete', 'id': task_id} for task_id in deleted])
+    
+    def sync_point(self, max_id: int, since: str) -> Dict:
+        stamp, journal_size = self.storage_stamp()
+        return {'stamp': stamp, 'journal_offset': journal_size, 'max_id': max_id, 'since': since}
+    
+    def sync_tasks(self, other_file: str) -> Optional[Dict[str, int]]:
+        """Exchange the tasks changed since the last sync with other_file
+        
+        Each file keeps the fingerprints of every task as of the last sync in its
+        .sync file. A task changed on one side is copied to the other; when both
+        changed it, the higher revision (then the later change) wins and an edit
+        beats a delete. Without a shared baseline, tasks under the same id are the
+        same task only if their creation time and title match; otherwise both are
+        kept, the later one moving to a fresh id.
+        """
+        here, there = os.path.abspath(self.data_file), os.path.abspath(other_file)
+        if here == there:
+            print("❌ A task file cannot be synced with itself")
+            return None
+        other = TodoApp(other_file, autoload=False)
+        sides = sorted([(here, self), (there, other)], key=lambda side: side[0])
+        
+        first, second = sides[0][1], sides[1][1]
+        # Journal locks before file locks, as in locked()
+        with first._journal_lock, second._journal_lock, first._file_lock.hold(), second._file_lock.hold():
+            # Anything modified from this second on is looked at by the next sync
+            since = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            state, other_state = self.read_sync_state(), other.read_sync_state()
+            point, other_point = state['peers'].get(there), other_state['peers'].get(here)
+            baseline = None
+            if point and other_point and point['token'] == other_point['token']:
+                baseline = {int(task_id): fingerprint for task_id, fingerprint in point['tasks'].items()}
+            
+            local, max_id = self.changes_since(point, baseline)
+            remote, other_max_id = other.changes_since(other_point, baseline)
+            next_id = max(max_id, other_max_id) + 1
+            archived = {}
+            
+            def keeps_archived(app: TodoApp, task_id: int) -> bool:
+                # Archiving deletes a task from the live list, which must not spread
+                if app.data_file not in archived:
+                    archived[app.data_file] = app.archived_ids()
+                return task_id in archived[app.data_file]
+            
+            pull, push = {}, {}
+            final: Dict[int, Optional[Dict]] = {}
+            summary = {'pulled': 0, 'pushed': 0, 'conflicts': 0, 'renumbered': 0}
+            for task_id in sorted(local.keys() | remote.keys()):
+                mine, theirs = local.get(task_id, False), remote.get(task_id, False)
+                if mine is False or theirs is False:
+                    record, source, target = (theirs, other, pull) if mine is False else (mine, self, push)
+                    if record is None and (baseline is None or task_id not in baseline
+                                           or keeps_archived(source, task_id)):
+                        continue
+                    target[task_id] = final[task_id] = record
+                elif mine is None and theirs is None:
+                    final[task_id] = None
+                elif mine is None or theirs is None:
+                    summary['conflicts'] += 1
+                    if mine is None:
+                        pull[task_id] = final[task_id] = theirs
+                    else:
+                        push[task_id] = final[task_id] = mine
+                elif record_fingerprint(mine) == record_fingerprint(theirs):
+                    final[task_id] = mine
+                elif (baseline is None or task_id not in baseline) and (
+                        mine.get('created_date'), mine.get('title')) != (theirs.get('created_date'), theirs.get('title')):
+                    # Two different tasks were given the same id; creation times
+                    # only have one second resolution, so ties go by content
+                    summary['renumbered'] += 1
+                    later_is_mine = (parse_created_stamp(mine.get('created_date')), record_fingerprint(mine)) > \
+                        (parse_created_stamp(theirs.get('created_date')), record_fingerprint(theirs))
+                    earlier, later = (theirs, mine) if later_is_mine else (mine, theirs)
+                    moved = dict(later, id=next_id)
+                    (pull if later_is_mine else push)[task_id] = earlier
+                    pull[next_id] = push[next_id] = final[next_id] = moved
+                    final[task_id] = earlier
+                    next_id += 1
+                else:
+                    summary['conflicts'] += 1
+                    winner = max((mine, theirs), key=lambda record: (
+                        record.get('revision') or 0, parse_created_stamp(record.get('modified_date')),
+                        record_fingerprint(record)))
+                    if winner is mine:
+                        push[task_id] = final[task_id] = mine
+                    else:
+                        pull[task_id] = final[task_id] = theirs
+            
+            for app, changes in ((self, pull), (other, push)):
+                if changes:
+                    app.apply_sync_changes([record for record in changes.values() if record is not None],
+                                           [task_id for task_id, record in changes.items() if record is None],
+                                           next_id - 1)
+            summary['pulled'], summary['pushed'] = len(pull), len(push)
+            
+            tasks = dict(baseline or {})
+            for task_id, record in final.items():
+                if record is None:
+                    tasks.pop(task_id, None)
+                else:
+                    tasks[task_id] = record_fingerprint(record)
+            token = f"{time.time_ns():x}-{os.getpid()}"
+            tasks = {str(task_id): fingerprint for task_id, fingerprint in tasks.items()}
+            for app, app_state, peer in ((self, state, there), (other, other_state, here)):
+                app_state['peers'][peer] = dict(app.sync_point(next_id - 1, since), token=token, tasks=tasks)
+                app.write_sync_state(app_state)
+        
+        if isinstance(other.tasks, SqliteTaskStore):
+            other.tasks.close()
+        return summary
+    
+    def migrate_from_json(self, json_file: str) -> Optional[int]:
+        """Copy a JSON task file into this one as a single undoable step;
+        None when this file already has tasks whose ids could clash"""
+        if self.tasks or self.archived_max_id():
+            print(f"❌ '{self.data_file}' already has tasks; migrate into a new file instead.")
+            return None
+        source = TodoApp(json_file, backend='json')
+        tasks = list(source.tasks)
+        with self.batch():
+            self.tasks.put_many(tasks)
+            self.record_changes('put', tasks)
+            self.next_id = max(self.next_id, source.next_id)
+        return len(tasks)
+    
+    def quick_add(self, title: str):
+        """Add a task, appending to the journal without reading the task list
+        when a saved disk state is at hand"""
+        with self.locked():
+            if self.partial and not self.restore_disk_state():
+                self.scan_next_id()
+            fingerprint = self.storage_fingerprint()
+            task = Task(self.next_id, title)
+            with self.batch():
+                self.tasks.put(task)
+                self.next_id += 1
+                self.record_change('put', task)
+            if self.partial and self.backend != 'sqlite':
+                self.count_added_task(fingerprint, task)
+        print(f"✅ Task '{title}' added successfully!")
+    
+    def ids_in_ranges(self, ranges: List[Tuple[int, int]]) -> Iterator[int]:
+        # Ranges wider than the task list only yield the ids that exist
+        for first, last in ranges:
+            if last - first >= len(self.tasks):
+                yield from sorted(task.id for task in self.tasks if first <= task.id <= last)
+            else:
+                yield from range(first, last + 1)
+    
+    def set_completion(self, task_ids: Iterable[int], completed: bool = True) -> int:
+        changed = 0
+        with self.batch():
+            for task_id in task_ids:
+                task = self.find_task_by_id(task_id)
+                if not task:
+                    print(f"⚠️  Task {task_id} not found!")
+                    continue
+                if task.completed == completed:
+                    continue
+                completed_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S') if completed else None
+                self.tasks.update(task, completed=completed, completed_date=completed_date)
+                self.record_change('put', task)
+                changed += 1
+        return changed
+    
+    def delete_tasks(self, task_ids: Iterable[int]) -> int:
+        deleted = []
+        with self.batch():
+            for task_id in task_ids:
+                task = self.find_task_by_id(task_id)
+                if not task:
+                    print(f"⚠️  Task {task_id} not found!")
+                    continue
+                self.tasks.remove(task)
+                deleted.append(task)
+            self.record_changes('delete', deleted)
+        return len(deleted)
+    
+    def set_priority(self, tasks: List[Task], priority: str) -> int:
+        changed = 0
+        with self.batch():
+            for task in tasks:
+                if task.priority != priority:
+                    self.tasks.update(task, priority=priority)
+                    self.record_change('put', task)
+                    changed += 1
+        return changed
+    
+    def add_task(self):
+        self.print_header("Add New Task")
+        
+        title = input("📌 Task title: ").strip()
+        if not title:
+            print("❌ Task title cannot be empty!")
+            return
+        
+        description = input("📄 Description (optional): ").strip()
+        
+        print("\n🎯 Priority levels:")
+        print("1. Low")
+        print("2. Medium")
+        print("3. High")
+        
+        priority_choice = input("Select priority (1-3, default: 2): ").strip()
+        priority_map = {'1': 'low', '2': 'medium', '3': 'high'}
+        priority = priority_map.get(priority_choice, 'medium')
+        
+        due_date = input("📅 Due date (YYYY-MM-DD, optional): ").strip()
+        if due_date:
+            try:
+                datetime.strptime(due_date, '%Y-%m-%d')
+            except ValueError:
+                print("❌ Invalid date format! Task will be created without due date.")
+                due_date = None
+        else:
+            due_date = None
+        
+        task = Task(self.next_id, title, description, priority, due_date)
+        with self.batch():
+            self.tasks.put(task)
+            self.next_id += 1
+            self.record_change('put', task)
+        
+        print(f"\n✅ Task '{title}' added successfully!")
+        self.pause()
+    
+    def list_tasks(self, filter_type: str = "all", days: int = 7,
+                   limit: Optional[int] = None, offset: int = 0, output_format: str = "pretty"):
+        titles = {
+            "pending": "Pending Tasks",
+            "completed": "Completed Tasks",
+            "overdue": "Overdue Tasks",
+            "today": "Tasks Due Today",
+            "upcoming": f"Tasks Due Within {days} Day(s)",
+        }
+        if filter_type not in titles:
+            filter_type = "all"
+        title = titles.get(filter_type, "All Tasks")
+        
+        filtered_tasks = self.tasks.listing(filter_type, days, limit, offset)
+        
+        if output_format != "pretty":
+            # Machine-readable output has no header or footer
+            with TaskRenderer(output_format) as renderer:
+                renderer.write_tasks(filtered_tasks)
+            return
+        
+        self.print_header(title)
+        
+        if not filtered_tasks:
+            print("📭 No tasks found!")
+            return
+        
+        with TaskRenderer() as renderer:
+            renderer.write_tasks(filtered_tasks)
+        
+        if limit is None and not offset:
+            print(f"\n📊 Total: {len(filtered_tasks)} task(s)")
+        else:
+            total = self.tasks.count(filter_type, days)
+            print(f"\n📊 Showing {offset + 1}-{offset + len(filtered_tasks)} of {total} task(s)")
+    
+    def print_task(self, task: Task):
+        print(format_task(task), end='')
+    
+    def update_task(self):
+        self.print_header("Update Task")
+        
+        if not self.tasks:
+            print("📭 No tasks available to update!")
+            return
+        
+        self.list_tasks("all")
+        
+        try:
+            task_id = int(input("\n🔢 Enter task ID to update: "))
+            task = self.find_task_by_id(task_id)
+            
+            if not task:
+                print("❌ Task not found!")
+                return
+            
+            print(f"\n📝 Updating task: {task.title}")
+            print("(Press Enter to keep current value)")
+            
+            # The answers are applied in one update, so the task gets one new revision
+            changes = {}
+            new_title = input(f"📌 Title [{task.title}]: ").strip()
+            if new_title:
+                changes['title'] = new_title
+            
+            changes['description'] = input(f"📄 Description [{task.description}]: ").strip()
+            
+            print("\n🎯 Priority levels:")
+            print("1. Low")
+            print("2. Medium") 
+            print("3. High")
+            
+            priority_choice = input(f"Priority [{task.priority}] (1-3): ").strip()
+            if priority_choice:
+                priority_map = {'1': 'low', '2': 'medium', '3': 'high'}
+                changes['priority'] = priority_map.get(priority_choice, task.priority)
+            
+            new_due_date = input(f"📅 Due date [{task.due_date or 'None'}] (YYYY-MM-DD): ").strip()
+            if new_due_date:
+                try:
+                    datetime.strptime(new_due_date, '%Y-%m-%d')
+                    changes['due_date'] = new_due_date
+                except ValueError:
+                    print("❌ Invalid date format! Due date not changed.")
+            else:
+                changes['due_date'] = None
+            
+            changes = {field: value for field, value in changes.items() if getattr(task, field) != value}
+            if changes:
+                with self.batch():
+                    self.tasks.update(task, **changes)
+                    self.record_change('put', task)
+                print(f"\n✅ Task '{task.title}' updated successfully!")
+            else:
+                print("\n📭 Nothing changed!")
+            
+        except ValueError:
+            print("❌ Invalid task ID!")
+        except KeyboardInterrupt:
+            print("\n❌ Update cancelled!")
+        
+        self.pause()
+    
+    def toggle_task_completion(self):
+        self.print_header("Toggle Task Completion")
+        
+        if not self.tasks:
+            print("📭 No tasks available!")
+            return
+        
+        self.list_tasks("all")
+        
+        try:
+            task_id = int(input("\n🔢 Enter task ID to toggle: "))
+            task = self.find_task_by_id(task_id)
+            
+            if not task:
+                print("❌ Task not found!")
+                return
+            
+            with self.batch():
+                if not task.completed:
+                    self.tasks.update(task, completed=True,
+                                      completed_date=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                    print(f"✅ Task '{task.title}' marked as completed!")
+                else:
+                    self.tasks.update(task, completed=False, completed_date=None)
+                    print(f"⏳ Task '{task.title}' marked as pending!")
+                
+                self.record_change('put', task)
+            
+        except ValueError:
+            print("❌ Invalid task ID!")
+        except KeyboardInterrupt:
+            print("\n❌ Operation cancelled!")
+        
+        self.pause()
+    
+    def delete_task(self):
+        self.print_header("Delete Task")
+        
+        if not self.tasks:
+            print("📭 No tasks available to delete!")
+            return
+        
+        self.list_tasks("all")
+        
+        try:
+            task_id = int(input("\n🔢 Enter task ID to delete: "))
+            task = self.find_task_by_id(task_id)
+            
+            if not task:
+                print("❌ Task not found!")
+                return
+            
+            confirm = input(f"⚠️  Are you sure you want to delete '{task.title}'? (y/N): ").strip().lower()
+            
+            if confirm == 'y' or confirm == 'yes':
+                with self.batch():
+                    self.tasks.remove(task)
+                    self.record_change('delete', task)
+                print(f"🗑️  Task '{task.title}' deleted successfully!")
+            else:
+                print("❌ Deletion cancelled!")
+                
+        except ValueError:
+            print("❌ Invalid task ID!")
+        except KeyboardInterrupt:
+            print("\n❌ Deletion cancelled!")
+        
+        self.pause()
+    
+    def find_task_by_id(self, task_id: int) -> Optional[Task]:
+        return self.tasks.get(task_id)
+    
+    def search_tasks(self, query: Optional[str] = None, output_format: str = "pretty"):
+        interactive = query is None
+        if output_format != "pretty" and not interactive:
+            with TaskRenderer(output_format) as renderer:
+                renderer.write_tasks(self.tasks.search(query.strip().lower()))
+            return
+        
+        self.print_header("Search Tasks")
+        
+        if not self.tasks:
+            print("📭 No tasks available to search!")
+            return
+        
+        if interactive:
+            query = input("🔍 Enter search term: ")
+        query = query.strip().lower()
+        
+        if not query:
+            print("❌ Search term cannot be empty!")
+            return
+        
+        matching_tasks = self.tasks.search(query)
+        
+        if matching_tasks:
+            print(f"\n🔍 Found {len(matching_tasks)} matching task(s):")
+            with TaskRenderer() as renderer:
+                renderer.write_tasks(matching_tasks)
+        else:
+            print(f"❌ No tasks found matching '{query}'")
+        
+        archived = self.read_archive_manifest()['tasks']
+        if interactive and archived and not self.include_archived:
+            answer = input(f"\n🗄️  Also search {archived} archived task(s)? (y/N): ").strip().lower()
+            if answer in ('y', 'yes'):
+                archived_matches = self.search_archive(query)
+                print(f"\n🗄️  Found {len(archived_matches)} matching archived task(s):")
+                with TaskRenderer() as renderer:
+                    renderer.write_tasks(archived_matches)
+        
+        if interactive:
+            self.pause()
+    
+    def query_tasks(self, text: Optional[str] = None, limit: Optional[int] = None, offset: int = 0,
+                    output_format: str = "pretty"):
+        interactive = text is None
+        if output_format != "pretty" and not interactive:
+            matching_tasks = self.tasks.query(TaskQuery(text))
+            with TaskRenderer(output_format) as renderer:
+                renderer.write_tasks(matching_tasks[offset:] if limit is None else matching_tasks[offset:offset + limit])
+            return
+        
+        self.print_header("Query Tasks")
+        
+        if interactive:
+            print('💡 e.g. priority:high due<2026-11-01 -completed "release"')
+            print("   Fields: id, priority, status, due, created, title, description")
+            text = input("🔎 Query: ")
+        
+        try:
+            query = TaskQuery(text)
+        except ValueError as e:
+            print(f"❌ Invalid query: {e}")
+        else:
+            matching_tasks = self.tasks.query(query)
+            page = matching_tasks[offset:] if limit is None else matching_tasks[offset:offset + limit]
+            if not page:
+                print("📭 No tasks found!")
+            else:
+                with TaskRenderer() as renderer:
+                    renderer.write_tasks(page)
+                if limit is None and not offset:
+                    print(f"\n📊 Total: {len(page)} task(s)")
+                else:
+                    print(f"\n📊 Showing {offset + 1}-{offset + len(page)} of {len(matching_tasks)} task(s)")
+        
+        if interactive:
+            self.pause()
+    
+    def show_statistics(self, stats: Optional[Dict] = None):
+        self.print_header("Task Statistics")
+        
+        if stats is None:
+            stats = self.tasks.statistics()
+        
+        if not stats['total']:
+            print("📭 No tasks available for statistics!")
+            return
+        
+        total_tasks = stats['total']
+        completed_tasks = stats['completed']
+        pending_tasks = total_tasks - completed_tasks
+        overdue_tasks = stats['overdue']
+        
+        high_priority = stats['pending_by_priority']['high']
+        medium_priority = stats['pending_by_priority']['medium']
+        low_priority = stats['pending_by_priority']['low']
+        
+        completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+        
+        print(f"📊 Total Tasks: {total_tasks}")
+        print(f"✅ Completed: {completed_tasks}")
+        print(f"⏳ Pending: {pending_tasks}")
+        print(f"⚠️  Overdue: {overdue_tasks}")
+        print(f"📈 Completion Rate: {completion_rate:.1f}%")
+        
+        print(f"\n🎯 Pending Tasks by Priority:")
+        print(f"🔴 High: {high_priority}")
+        print(f"🟡 Medium: {medium_priority}")
+        print(f"🟢 Low: {low_priority}")
+        
+        if stats['oldest'] and stats['newest']:
+            oldest_task = stats['oldest']
+            newest_task = stats['newest']
+            
+            print(f"\n📅 Task Timeline:")
+            print(f"Oldest task: {oldest_task['title']} ({oldest_task['created_date']})")
+            print(f"Newest task: {newest_task['title']} ({newest_task['created_date']})")
+        
+        self.pause()
+    
+    def clear_completed_tasks(self):
+        self.print_header("Clear Completed Tasks")
+        
+        completed_tasks = self.tasks.completed()
+        
+        if not completed_tasks:
+            print("📭 No completed tasks to clear!")
+            return
+        
+        print(f"Found {len(completed_tasks)} completed task(s):")
+        for task in completed_tasks:
+            print(f"  ✅ {task.title}")
+        
+        confirm = input(f"\n⚠️  Are you sure you want to delete all {len(completed_tasks)} completed task(s)? (y/N): ").strip().lower()
+        
+        if confirm == 'y' or confirm == 'yes':
+            with self.batch():
+                for task in completed_tasks:
+                    self.tasks.remove(task)
+                self.record_changes('delete', completed_tasks)
+            print(f"🗑️  {len(completed_tasks)} completed task(s) cleared successfully!")
+        else:
+            print("❌ Operation cancelled!")
+        
+        self.pause()
+    
+    def iter_export_records(self, filter_type: str = "all", days: int = 7) -> Iterator[Dict]:
+        streamed = self.backend == 'sqlite' or self.partial
+        if self.backend == 'sqlite':
+            store = self.tasks if isinstance(self.tasks, SqliteTaskStore) else SqliteTaskStore(self.data_file)
+            yield from store.iter_records(filter_type, days)
+        elif self.partial:
+            # Nothing (or only part) is loaded, so stream straight from disk
+            for record in self.iter_records():
+                if record_matches(record, filter_type, days):
+                    yield record
+        else:
+            for task in self.tasks.filtered(filter_type, days):
+                yield task.to_dict()
+        if streamed and self.include_archived:
+            for record in self.iter_archived_records():
+                if record_matches(record, filter_type, days):
+                    yield record
+    
+    def export_tasks(self, path: Optional[str] = None, file_format: str = "text",
+                     filter_type: str = "all", days: int = 7, compress: bool = False) -> int:
+        import csv
+        if path is None:
+            path = f"todo_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXPORT_FORMATS[file_format]}"
+            if compress:
+                path += ".gz"
+        # Status messages must not end up in an export written to stdout
+        status = sys.stderr if path == '-' else sys.stdout
+        started = time.time()
+        exported = 0
+        
+        try:
+            with open_export(path, compress) as f:
+                buffer = io.StringIO()
+                if file_format == "csv":
+                    writer = csv.writer(buffer)
+                    writer.writerow(EXPORT_COLUMNS)
+                elif file_format == "text":
+                    total = self.count_tasks(filter_type, days) if self.partial else self.tasks.count(filter_type, days)
+                    buffer.write("📝 TO-DO LIST EXPORT\n")
+                    buffer.write("=" * 50 + "\n")
+                    buffer.write(f"Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                    buffer.write(f"Total Tasks: {total}\n\n")
+                
+                for record in self.iter_export_records(filter_type, days):
+                    if file_format == "ndjson":
+                        buffer.write(json.dumps(record, ensure_ascii=False))
+                        buffer.write("\n")
+                    elif file_format == "csv":
+                        writer.writerow([record.get(column) for column in EXPORT_COLUMNS])
+                    else:
+                        buffer.write(format_export_text(record))
+                    exported += 1
+                    if buffer.tell() >= EXPORT_BUFFER_CHARS:
+                        f.write(buffer.getvalue().encode('utf-8'))
+                        buffer.seek(0)
+                        buffer.truncate()
+                f.write(buffer.getvalue().encode('utf-8'))
+        except (OSError, EOFError, ValueError, json.JSONDecodeError) as e:
+            print(f"❌ Error exporting tasks: {e}", file=status)
+            return 0
+        
+        target = "stdout" if path == '-' else f"'{path}'"
+        print(f"✅ {exported} task(s) exported successfully to {target} in {time.time() - started:.1f}s!",
+              file=status)
+        return exported
+    
+    def export_menu(self):
+        self.print_header("Export Tasks")
+        
+        if not self.tasks:
+            print("📭 No tasks to export!")
+            return
+        
+        file_format = input("Format (text/ndjson/csv) [text]: ").strip().lower() or "text"
+        if file_format not in EXPORT_FORMATS:
+            print("❌ Invalid format! Use text, ndjson or csv.")
+        else:
+            self.export_tasks(file_format=file_format)
+        
+        self.pause()
+    
+    def undo_menu(self, redo: bool = False):
+        self.print_header("Redo" if redo else "Undo")
+        
+        if self.undo(1, redo):
+            print("↪️  Last undone change reapplied!" if redo else "↩️  Last change undone!")
+        else:
+            print(f"📭 Nothing to {'redo' if redo else 'undo'}!")
+        
+        self.pause()
+    
+    def switch_list_menu(self):
+        self.print_header("Switch List")
+        
+        for name in self.workspace.lists:
+            marker = "👉" if name == self.workspace.active else "  "
+            stats = self.workspace.open(name).load_stats_summary()
+            counts = f"{stats['total']} task(s), {stats['total'] - stats['completed']} pending" if stats else "not summarized yet"
+            print(f"{marker} {name:<20} {counts}")
+        
+        name = input("\n🗂️  List to open (a new name creates it): ").strip()
+        if not name or name == self.workspace.active:
+            return
+        if name not in self.workspace.lists:
+            confirm = input(f"Create a new list '{name}'? (y/N): ").strip().lower()
+            if confirm not in ('y', 'yes'):
+                return
+        try:
+            self.workspace.check_name(name)
+        except ValueError as e:
+            print(f"❌ {e}")
+            self.pause()
+            return
+        self.switch_to = name
+    
+    def show_menu(self):
+        self.print_header("To-Do List Manager")
+        print("1. 📝 Add Task")
+        print("2. 📋 List All Tasks")
+        print("3. ⏳ List Pending Tasks")
+        print("4. ✅ List Completed Tasks")
+        print("5. ⚠️  List Overdue Tasks")
+        print("6. ✏️  Update Task")
+        print("7. 🔄 Toggle Task Completion")
+        print("8. 🗑️  Delete Task")
+        print("9. 🔍 Search Tasks")
+        print("10. 📊 Show Statistics")
+        print("11. 🧹 Clear Completed Tasks")
+        print("12. 📤 Export Tasks")
+        print("13. 🔎 Query Tasks")
+        print("14. ↩️  Undo Last Change")
+        print("15. ↪️  Redo")
+        if self.workspace is not None:
+            print(f"16. 🗂️  Switch List (current: {self.workspace.active})")
+        print("0. 🚪 Exit")
+        unsaved = self.unsaved_changes()
+        if unsaved:
+            print(f"💾 {unsaved} unsaved change(s), saving in the background...")
+        print("=" * 60)
+    
+    def archive_on_exit(self):
+        if self.archive_after_days:
+            archived = self.archive_completed(self.archive_after_days)
+            if archived:
+                print(f"\n🗄️  Archived {archived} task(s) completed over {self.archive_after_days} days ago.")
+    
+    def pause(self):
+        """Wait for Enter at the end of a menu action
+        
+        The background writer may save meanwhile: the action holds _store_lock,
+        but no change is half done once it only waits for the user.
+        """
+        if self._writer is None or self._batch_entries is not None:
+            input("\nPress Enter to continue...")
+            return
+        self._store_lock.release()
+        try:
+            input("\nPress Enter to continue...")
+        finally:
+            self._store_lock.acquire()
+    
+    def run(self):
+        self.start_background_writer()
+        try:
+            while True:
+                try:
+                    self.clear_screen()
+                    self.show_menu()
+                    
+                    choice = input(f"👉 Select an option (0-{15 if self.workspace is None else 16}): ").strip()
+                    # The background writer waits while a menu action runs
+                    with self._store_lock:
+                        self.run_choice(choice)
+                    if self.switch_to is not None:
+                        # The caller opens the chosen list once this one is saved
+                        self.stop_background_writer()
+                        self.archive_on_exit()
+                        self.save_search_index()
+                        return
+                        
+                except KeyboardInterrupt:
+                    self.stop_background_writer()
+                    self.archive_on_exit()
+                    self.save_search_index()
+                    print("\n\n👋 Goodbye!")
+                    sys.exit(0)
+                except Exception as e:
+                    print(f"\n❌ An error occurred: {e}")
+                    input("\nPress Enter to continue...")
+        finally:
+            # Also covers sys.exit() from anywhere inside the loop
+            self.stop_background_writer()
+    
+    def run_choice(self, choice: str):
+        if choice == '1':
+            self.add_task()
+        elif choice == '2':
+            self.list_tasks("all")
+            self.pause()
+        elif choice == '3':
+            self.list_tasks("pending")
+            self.pause()
+        elif choice == '4':
+            self.list_tasks("completed")
+            self.pause()
+        elif choice == '5':
+            self.list_tasks("overdue")
+            self.pause()
+        elif choice == '6':
+            self.update_task()
+        elif choice == '7':
+            self.toggle_task_completion()
+        elif choice == '8':
+            self.delete_task()
+        elif choice == '9':
+            self.search_tasks()
+        elif choice == '10':
+            self.show_statistics()
+        elif choice == '11':
+            self.clear_completed_tasks()
+        elif choice == '12':
+            self.export_menu()
+        elif choice == '13':
+            self.query_tasks()
+        elif choice == '14':
+            self.undo_menu()
+        elif choice == '15':
+            self.undo_menu(redo=True)
+        elif choice == '16' and self.workspace is not None:
+            self.switch_list_menu()
+        elif choice == '0':
+            self.stop_background_writer()
+            self.archive_on_exit()
+            self.save_search_index()
+            print("\n👋 Thank you for using To-Do List Manager!")
+            print("Your tasks have been saved automatically.")
+            sys.exit(0)
+        else:
+            print("❌ Invalid option! Please try again.")
+            self.pause()
+
+
+class Workspace:
+    """Named task lists kept in one manifest; only the active list is ever loaded
+    
+    Statistics and search across lists come from each list's saved summary
+    and search index, so lists are only read when those are out of date.
+    """
+    
+    def __init__(self, manifest_file: str):
+        self.manifest_file = manifest_file
+        self.root = os.path.dirname(os.path.abspath(manifest_file))
+        # List name -> task file, relative to the manifest
+        self.lists: Dict[str, str] = {}
+        self.active: Optional[str] = None
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != WORKSPACE_VERSION:
+                raise ValueError(f"'{manifest_file}' is not a workspace manifest")
+            self.lists = dict(manifest['lists'])
+            self.active = manifest.get('active')
+        if not self.lists:
+            self.lists[DEFAULT_LIST_NAME] = DEFAULT_LIST_NAME + ".json"
+        if self.active not in self.lists:
+            self.active = next(iter(self.lists))
+    
+    def save(self):
+        manifest = {'version': WORKSPACE_VERSION, 'active': self.active, 'lists': self.lists}
+        temp_file = self.manifest_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, self.manifest_file)
+    
+    @staticmethod
+    def check_name(name: str):
+        if not re.fullmatch(r'[\w.-]+', name) or name.startswith('.'):
+            raise ValueError(f"invalid list name: '{name}' (use letters, digits, '.', '_' and '-')")
+    
+    def path(self, name: Optional[str] = None) -> str:
+        return os.path.join(self.root, self.lists[name or self.active])
+    
+    def switch(self, name: str, data_file: Optional[str] = None) -> bool:
+        """Make name the active list, creating it if needed; True if it is new"""
+        self.check_name(name)
+        created = name not in self.lists
+        if created:
+            self.lists[name] = data_file or name + ".json"
+        self.active = name
+        self.save()
+        return created
+    
+    def open(self, name: Optional[str] = None, backend: Optional[str] = None) -> TodoApp:
+        app = TodoApp(self.path(name), backend, autoload=False)
+        app.workspace = self
+        return app
+    
+    def statistics(self) -> Dict[str, Dict]:
+        return {name: self.open(name).list_statistics() for name in self.lists}
+    
+    def search(self, query: str) -> Dict[str, List[Task]]:
+        return {name: self.open(name).search_unloaded(query) for name in self.lists}
+
+
+def run_workspace_command(workspace: Workspace, args: 'argparse.Namespace',
+                          parser: 'argparse.ArgumentParser') -> bool:
+    """Run a command about the whole workspace; False when none was given"""
+    if args.switch:
+        name, _, data_file = args.switch.partition('=')
+        try:
+            created = workspace.switch(name, data_file or None)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"🗂️  {'Created and switched' if created else 'Switched'} to list '{name}'!")
+        return True
+    
+    if args.lists:
+        for name, stats in workspace.statistics().items():
+            marker = "👉" if name == workspace.active else "  "
+            print(f"{marker} {name:<20} {stats['total']:>8} task(s) {stats['total'] - stats['completed']:>8} pending "
+                  f"{stats['overdue']:>6} overdue  {workspace.lists[name]}")
+        return True
+    
+    if not args.all_lists:
+        return False
+    if args.search:
+        results = workspace.search(args.search)
+        if args.format != "pretty":
+            with TaskRenderer(args.format) as renderer:
+                for tasks in results.values():
+                    renderer.write_tasks(tasks)
+            return True
+        total = 0
+        for name, tasks in results.items():
+            if not tasks:
+                continue
+            print(f"\n🗂️  {name}: {len(tasks)} task(s)")
+            with TaskRenderer() as renderer:
+                renderer.write_tasks(tasks)
+            total += len(tasks)
+        print(f"\n🔍 Found {total} matching task(s) in {len(results)} list(s)")
+        return True
+    if args.stats:
+        all_stats = workspace.statistics()
+        for name, stats in all_stats.items():
+            print(f"🗂️  {name}: {stats['total']} task(s), {stats['completed']} completed, {stats['overdue']} overdue")
+        workspace.open().show_statistics(merge_statistics(list(all_stats.values())))
+        return True
+    parser.error("--all-lists works with --search and --stats")
+
+
+def parse_days(value: str) -> int:
+    """Parse a day span such as '7', '7d' or '2w' into a number of days"""
+    import argparse
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith('w'):
+        value, multiplier = value[:-1], 7
+    elif value.endswith('d'):
+        value = value[:-1]
+    try:
+        days = int(value) * multiplier
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid day span: '{value}' (use e.g. 7d or 2w)")
+    if days < 0:
+        raise argparse.ArgumentTypeError("day span cannot be negative")
+    return days
+
+
+def parse_id_list(value: str) -> List[Tuple[int, int]]:
+    """Parse task ids such as '1,2,3' or '4-9,12' into (first, last) ranges"""
+    import argparse
+    ranges = []
+    try:
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                first, last = part.split('-', 1)
+                ranges.append((int(first), int(last)))
+            else:
+                ranges.append((int(part), int(part)))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid task id list: '{value}'")
+    return ranges
+
+
+class Timings:
+    """Wall time and memory growth of the main TodoApp operations
+    
+    Nothing is wrapped until enable() is called, so instrumentation costs
+    nothing when it is off. Times are inclusive of nested operations. Net
+    blocks is the change in live interpreter memory blocks across a call,
+    not a count of allocations: blocks freed before it returns cancel out.
+    """
+    
+    # (category, class, method)
+    TARGETS = [
+        ('load', 'TodoApp', 'load_tasks'),
+        ('load', 'TodoApp', 'count_tasks'),
+        ('load', 'TodoApp', 'scan_next_id'),
+        ('load', 'TodoApp', 'mapped_store'),
+        ('load', 'TodoApp', 'sync_with_disk'),
+        ('save', 'TodoApp', 'save_tasks'),
+        ('save', 'TodoApp', 'append_journal'),
+        ('save', 'TodoApp', 'write_temp_snapshot'),
+        ('save', 'TodoApp', 'save_stats_summary'),
+        ('save', 'TodoApp', 'save_search_index'),
+        ('filter', 'TaskStore', 'filtered'),
+        ('filter', 'TaskStore', 'count'),
+        ('filter', 'TaskStore', 'search'),
+        ('filter', 'TaskStore', 'query'),
+        ('filter', 'SqliteTaskStore', 'filtered'),
+        ('filter', 'SqliteTaskStore', 'count'),
+        ('filter', 'SqliteTaskStore', 'search'),
+        ('filter', 'SqliteTaskStore', 'query'),
+        ('filter', 'MappedTaskStore', 'count'),
+        ('sort', 'TaskStore', '__init__'),
+        ('sort', 'TaskStore', 'listing'),
+        ('sort', 'SqliteTaskStore', 'listing'),
+        ('sort', 'MappedTaskStore', 'listing'),
+        ('stats', 'TaskStore', 'statistics'),
+        ('stats', 'SqliteTaskStore', 'statistics'),
+        ('render', 'TodoApp', 'list_tasks'),
+        ('render', 'TodoApp', 'query_tasks'),
+        ('render', 'TodoApp', 'search_tasks'),
+        ('render', 'TodoApp', 'show_statistics'),
+        ('render', 'TaskRenderer', 'write_tasks'),
+        ('render', 'TaskRenderer', 'flush'),
+        ('render', 'TodoApp', 'export_tasks'),
+    ]
+    
+    def __init__(self):
+        # label -> [calls, total seconds, slowest call, net allocated blocks]
+        self.stats: Dict[str, List] = {}
+        self.originals: List[tuple] = []
+    
+    def enable(self):
+        for category, owner, name in self.TARGETS:
+            cls = globals()[owner]
+            function = cls.__dict__[name]
+            self.originals.append((cls, name, function))
+            setattr(cls, name, self._wrap(function, f"{category}: {owner}.{name}"))
+    
+    def disable(self):
+        for cls, name, function in reversed(self.originals):
+            setattr(cls, name, function)
+        self.originals.clear()
+    
+    def _wrap(self, function: Callable, label: str) -> Callable:
+        stats = self.stats
+        
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            blocks = sys.getallocatedblocks()
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                entry = stats.setdefault(label, [0, 0.0, 0.0, 0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+                entry[3] += sys.getallocatedblocks() - blocks
+        return timed
+    
+    def print_summary(self, file=sys.stderr):
+        print("\n⏱️  Timings (inclusive of nested operations)", file=file)
+        print(f"{'Operation':<42} {'Calls':>7} {'Total ms':>10} {'Mean ms':>9} {'Max ms':>9} {'Net blocks':>13}",
+              file=file)
+        print("-" * 95, file=file)
+        for label, (calls, total, slowest, blocks) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            print(f"{label:<42} {calls:>7} {total * 1000:>10.1f} {total * 1000 / calls:>9.2f} "
+                  f"{slowest * 1000:>9.1f} {blocks:>+13,}", file=file)
+        if not self.stats:
+            print("(no instrumented operations ran)", file=file)
+
+
+@contextmanager
+def instrumentation(show_timings: bool = False, profile_file: Optional[str] = None):
+    """Collect timings and/or a cProfile dump around the wrapped block"""
+    if not show_timings and not profile_file:
+        yield
+        return
+    
+    timings = Timings()
+    timings.enable()
+    profiler = None
+    if profile_file:
+        # Only loaded when asked for
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        timings.disable()
+        timings.print_summary()
+        if profiler is not None:
+            import pstats
+            profiler.dump_stats(profile_file)
+            print(f"\n📈 Profile written to '{profile_file}' (inspect with: python -m pstats {profile_file})",
+                  file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(15)
+
+
+def daemon_socket_path(data_file: str) -> str:
+    return os.path.abspath(data_file) + ".sock"
+
+
+def call_daemon(socket_path: str, argv: List[str]) -> Optional[Dict]:
+    """Run a command in a --serve daemon; None when no daemon took it"""
+    if not os.path.exists(socket_path):
+        return None
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(1)
+            client.connect(socket_path)
+            client.settimeout(DAEMON_ACCEPT_SECONDS)
+            request = {'argv': argv, 'cwd': os.getcwd()}
+            client.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            client.shutdown(socket.SHUT_WR)
+            with client.makefile('rb') as f:
+                if f.readline() != DAEMON_ACK:
+                    return None
+                # Past this point the command may have run, so it must not run again here
+                client.settimeout(DAEMON_REPLY_SECONDS)
+                try:
+                    return json.loads(f.read())
+                except socket.timeout:
+                    return {'output': f"❌ The daemon took the command but has not answered in "
+                                      f"{DAEMON_REPLY_SECONDS}s; it may still be running\n",
+                            'status': 1, 'handled': True}
+    except (OSError, ValueError):
+        # A stale socket left by a killed daemon, or one stuck on another
+        # command; run the command locally
+        return None
+
+
+def serve(app: 'TodoApp', parser: 'argparse.ArgumentParser', socket_path: str):
+    """Answer CLI commands from a warm TodoApp until interrupted"""
+    import signal
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        parser.error("--serve needs Unix domain sockets")
+    if call_daemon(socket_path, []) is not None:
+        parser.error(f"a daemon is already serving '{app.data_file}'")
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    
+    import sqlite3
+    try:
+        app.load_tasks()
+    except sqlite3.Error as e:
+        parser.error(f"cannot open '{app.data_file}': {e}")
+    fingerprint = app.storage_fingerprint()
+    
+    def stop(signum, frame):
+        # kill and service managers send SIGTERM; stop the way Ctrl+C does so the socket is removed
+        raise KeyboardInterrupt
+    
+    previous_handler = signal.signal(signal.SIGTERM, stop)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(socket_path)
+        os.chmod(socket_path, 0o600)
+        server.listen()
+        print(f"🚀 Serving '{app.data_file}' on {socket_path} (Ctrl+C to stop)")
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    with conn.makefile('rb') as f:
+                        request = json.loads(f.readline())
+                    conn.sendall(DAEMON_ACK)
+                except (OSError, ValueError):
+                    continue
+                # Reload if another process changed the task file behind our back
+                if app.backend != 'sqlite' and app.storage_fingerprint() != fingerprint:
+                    app.load_tasks()
+                response = handle_request(app, parser, request)
+                fingerprint = app.storage_fingerprint()
+                try:
+                    conn.sendall(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                except OSError:
+                    pass
+    except KeyboardInterrupt:
+        print("\n👋 Daemon stopped.")
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        server.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        if app._compaction_thread:
+            app._compaction_thread.join()
+        app.save_search_index()
+
+
+def handle_request(app: 'TodoApp', parser: 'argparse.ArgumentParser', request: Dict) -> Dict:
+    output = io.StringIO()
+    status = 0
+    handled = True
+    stdin = sys.stdin
+    # Prompts such as "Press Enter to continue..." hit EOF instead of blocking the daemon
+    sys.stdin = io.StringIO()
+    try:
+        with redirect_stdout(output), redirect_stderr(output):
+            try:
+                os.chdir(request.get('cwd') or os.sep)
+                args = parser.parse_args(request.get('argv', []))
+                handled = run_command(app, args, parser)
+                if app.partial:
+                    # Archived tasks were loaded for this request only
+                    app.include_archived = False
+                    app.load_tasks()
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except EOFError:
+                pass
+            except Exception as e:
+                print(f"❌ An error occurred: {e}")
+                status = 1
+    finally:
+        sys.stdin = stdin
+    return {'output': output.getvalue(), 'status': status, 'handled': handled}
+
+
+def build_parser() -> 'argparse.ArgumentParser':
+    import argparse
+    parser = argparse.ArgumentParser(description='📝 Command-Line To-Do List Manager')
+    parser.add_argument('--file', '-f', default='tasks.json', 
+                       help='JSON file to store tasks (default: tasks.json)')
+    parser.add_argument('--backend', choices=['json', 'sqlite', 'binary'],
+                       help='Storage backend (default: sqlite for .db files, binary for .tdb files, '
+                            'json otherwise)')
+    parser.add_argument('--convert', metavar='TARGET_FILE',
+                       help='Write every task into TARGET_FILE (binary for .tdb, JSON otherwise)')
+    parser.add_argument('--sync', metavar='OTHER_FILE',
+                       help='Exchange the tasks changed since the last sync with OTHER_FILE')
+    parser.add_argument('--migrate', metavar='JSON_FILE',
+                       help='Copy every task from a JSON task file into --file')
+    parser.add_argument('--import', dest='import_file', metavar='FILE',
+                       help='Bulk import tasks from an NDJSON or CSV file')
+    parser.add_argument('--import-format', choices=['ndjson', 'csv'],
+                       help='Format of --import (default: from the file extension)')
+    parser.add_argument('--export', metavar='FILE',
+                       help='Export tasks chosen by the listing flags to FILE (- for stdout)')
+    parser.add_argument('--export-format', choices=list(EXPORT_FORMATS),
+                       help='Format of --export (default: from the file extension, else text)')
+    parser.add_argument('--gzip', action='store_true',
+                       help='Gzip the export (implied by a .gz file name)')
+    parser.add_argument('--add', '-a', help='Quickly add a task')
+    parser.add_argument('--list', '-l', action='store_true', help='List all tasks')
+    parser.add_argument('--pending', '-p', action='store_true', help='List pending tasks')
+    parser.add_argument('--completed', '-c', action='store_true', help='List completed tasks')
+    parser.add_argument('--overdue', '-o', action='store_true', help='List overdue tasks')
+    parser.add_argument('--due-today', action='store_true', help='List pending tasks due today')
+    parser.add_argument('--due-within', metavar='SPAN', type=parse_days,
+                       help='List pending tasks due within SPAN (e.g. 7d, 2w)')
+    parser.add_argument('--stats', '-s', action='store_true', help='Show statistics')
+    parser.add_argument('--search', metavar='TERM', help='Search task titles and descriptions')
+    parser.add_argument('--save-index', action='store_true',
+                       help='Save the search index next to the task file, so later searches '
+                            'skip building it until the tasks change')
+    parser.add_argument('--workspace', '-w', metavar='MANIFEST',
+                       help='Use the named task lists of a workspace manifest instead of --file')
+    parser.add_argument('--use', metavar='NAME', help='Run the command on this workspace list, not the active one')
+    parser.add_argument('--switch', metavar='NAME[=FILE]',
+                       help='Make NAME the active workspace list, creating it (in FILE, default NAME.json) '
+                            'if it does not exist')
+    parser.add_argument('--lists', action='store_true', help='Show the workspace lists with their task counts')
+    parser.add_argument('--all-lists', action='store_true',
+                       help='Run --search or --stats across every workspace list')
+    parser.add_argument('--query', '-q', metavar='QUERY',
+                       help='List tasks matching a query, e.g. \'priority:high due<2026-11-01 -completed "release"\'')
+    parser.add_argument('--limit', '-n', type=int, metavar='N', help='Show at most N tasks in listings')
+    parser.add_argument('--offset', type=int, default=0, metavar='N', help='Skip the first N tasks in listings')
+    parser.add_argument('--page', type=int, metavar='N',
+                       help=f'Show page N of listings (default page size: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--count', action='store_true',
+                       help='Only count the tasks matched by the listing flags')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='pretty',
+                       help='Output format of listings, --search and --query (default: pretty)')
+    parser.add_argument('--complete', metavar='IDS', type=parse_id_list,
+                       help='Mark tasks as completed, e.g. 1,2,5-9')
+    parser.add_argument('--reopen', metavar='IDS', type=parse_id_list,
+                       help='Mark tasks as pending again')
+    parser.add_argument('--delete', metavar='IDS', type=parse_id_list, help='Delete tasks')
+    parser.add_argument('--set-priority', choices=['low', 'medium', 'high'],
+                       help='Change the priority of the tasks chosen by --ids or --where')
+    parser.add_argument('--ids', metavar='IDS', type=parse_id_list,
+                       help='Tasks for --set-priority')
+    parser.add_argument('--where', choices=['all', 'pending', 'completed', 'overdue', 'today'],
+                       help='Task filter for --set-priority')
+    parser.add_argument('--undo', metavar='N', type=int, nargs='?', const=1,
+                       help='Undo the last N changes (default: 1)')
+    parser.add_argument('--redo', metavar='N', type=int, nargs='?', const=1,
+                       help='Redo the last N undone changes (default: 1)')
+    parser.add_argument('--archive', action='store_true',
+                       help='Move old completed tasks into the archive now')
+    parser.add_argument('--archive-after', metavar='SPAN', type=parse_days, default=ARCHIVE_AFTER_DAYS,
+                       help=f'Age at which completed tasks are archived (default: {ARCHIVE_AFTER_DAYS}d, '
+                            f'0 turns off archiving on exit)')
+    parser.add_argument('--include-archived', action='store_true',
+                       help='Include archived tasks in listings, counts, exports, stats and search')
+    
+    parser.add_argument('--serve', action='store_true',
+                       help='Keep the task list loaded and answer commands over a local socket')
+    parser.add_argument('--no-daemon', action='store_true',
+                       help='Run the command in this process even if a daemon is serving --file')
+    parser.add_argument('--timings', action='store_true',
+                       help='Print how long loading, saving, filtering, sorting and rendering took '
+                            '(or set TODO_TIMINGS=1)')
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='todo.prof',
+                       help='Print timings and write a cProfile dump to FILE '
+                            '(default: todo.prof, or set TODO_PROFILE=FILE)')
+    return parser
+
+
+def run_command(app: 'TodoApp', args: 'argparse.Namespace', parser: 'argparse.ArgumentParser') -> bool:
+    """Run the one-shot command chosen by args; False when none was given"""
+    limit, offset = args.limit, args.offset
+    if args.page is not None:
+        limit = limit or DEFAULT_PAGE_SIZE
+        offset = (max(args.page, 1) - 1) * limit
+    if (limit is not None and limit < 0) or offset < 0:
+        parser.error("--limit, --offset and --page must not be negative")
+    
+    app.include_archived = args.include_archived
+    app.archive_after_days = args.archive_after
+    # Once asked for, a daemon keeps saving its index
+    app.save_index = app.save_index or args.save_index
+    if app.partial and app.backend == 'sqlite':
+        # Opening the database is cheap, and a broken one is reported here
+        # once instead of by whichever command reads it first
+        import sqlite3
+        try:
+            app.load_tasks()
+        except sqlite3.Error as e:
+            print(f"⚠️  Error loading tasks: {e}")
+            sys.exit(1)
+    # A fully loaded app (the daemon's) answers everything from memory
+    warm = not app.partial and not args.include_archived
+    
+    # Statistics can be answered from the summary kept next to the task file
+    if args.stats:
+        if warm:
+            stats = app.tasks.statistics()
+        elif args.include_archived:
+            stats = None
+        else:
+            stats = app.load_stats_summary()
+        if stats is None:
+            app.load_tasks()
+            stats = app.tasks.statistics()
+            app.save_stats_summary()
+        app.show_statistics(stats)
+        return True
+    
+    listing_flags = [
+        (args.list, "all"),
+        (args.pending, "pending"),
+        (args.completed, "completed"),
+        (args.overdue, "overdue"),
+        (args.due_today, "today"),
+        (args.due_within is not None, "upcoming"),
+    ]
+    filter_type = next((name for flag, name in listing_flags if flag), None)
+    days = args.due_within if args.due_within is not None else 7
+    
+    # One-shot commands only build Task objects for the records they need
+    if args.import_file:
+        file_format = args.import_format
+        if file_format is None:
+            file_format = 'csv' if args.import_file.lower().endswith('.csv') else 'ndjson'
+        app.import_tasks(args.import_file, file_format)
+        if warm:
+            app.load_tasks()
+        return True
+    
+    if args.convert:
+        count = app.convert_tasks(args.convert)
+        print(f"✅ Converted {count} task(s) from '{args.file}' to '{args.convert}'!")
+        return True
+    
+    if args.sync:
+        import sqlite3
+        started = time.time()
+        try:
+            summary = app.sync_tasks(args.sync)
+        except (OSError, ValueError, KeyError, json.JSONDecodeError, sqlite3.Error, struct.error) as e:
+            print(f"❌ Error syncing tasks: {e}")
+            return True
+        if summary is not None:
+            print(f"🔄 Synced '{args.file}' with '{args.sync}': {summary['pulled']} pulled, "
+                  f"{summary['pushed']} pushed, {summary['conflicts']} conflict(s), "
+                  f"{summary['renumbered']} renumbered in {time.time() - started:.2f}s")
+        if warm:
+            app.load_tasks()
+        return True
+    
+    if args.add:
+        app.quick_add(args.add)
+        return True
+    
+    if args.query:
+        try:
+            query = TaskQuery(args.query)
+        except ValueError as e:
+            parser.error(f"invalid query: {e}")
+        if not warm:
+            app.load_tasks()
+        if args.count:
+            print(f"📊 {len(app.tasks.query(query))} task(s)")
+        else:
+            app.query_tasks(args.query, limit, offset, args.format)
+        return True
+    
+    if args.count:
+        if warm:
+            print(f"📊 {app.tasks.count(filter_type or 'all', days)} task(s)")
+        else:
+            print(f"📊 {app.count_tasks(filter_type or 'all', days)} task(s)")
+        return True
+    
+    if args.export:
+        name = args.export.lower()
+        compress = args.gzip or name.endswith('.gz')
+        if name.endswith('.gz'):
+            name = name[:-3]
+        file_format = args.export_format
+        if file_format is None:
+            file_format = 'text'
+            for candidate, extension in EXPORT_FORMATS.items():
+                if name.endswith(extension) or (candidate == 'ndjson' and name.endswith('.jsonl')):
+                    file_format = candidate
+        app.export_tasks(args.export, file_format, filter_type or 'all', days, compress)
+        return True
+    
+    if filter_type:
+        if not warm:
+            app.load_tasks(filter_type, days)
+        app.list_tasks(filter_type, days, limit=limit, offset=offset, output_format=args.format)
+        return True
+    
+    if not warm:
+        app.load_tasks()
+    
+    if args.archive:
+        archived = app.archive_completed(args.archive_after)
+        print(f"🗄️  Archived {archived} task(s) completed over {args.archive_after} days ago!")
+        return True
+    
+    if args.undo is not None or args.redo is not None:
+        for steps, redo in ((args.undo, False), (args.redo, True)):
+            if steps:
+                applied = app.undo(steps, redo)
+                if applied:
+                    print(f"{'↪️  Redid' if redo else '↩️  Undid'} {applied} change(s)!")
+                else:
+                    print(f"📭 Nothing to {'redo' if redo else 'undo'}!")
+        return True
+    
+    # Bulk changes from one invocation are persisted together
+    if args.complete or args.reopen or args.delete or args.set_priority:
+        with app.batch():
+            if args.complete:
+                print(f"✅ {app.set_completion(app.ids_in_ranges(args.complete), True)} task(s) marked as completed!")
+            if args.reopen:
+                print(f"⏳ {app.set_completion(app.ids_in_ranges(args.reopen), False)} task(s) marked as pending!")
+            if args.delete:
+                print(f"🗑️  {app.delete_tasks(app.ids_in_ranges(args.delete))} task(s) deleted!")
+            if args.set_priority:
+                if args.ids is not None:
+                    targets = [task for task in map(app.find_task_by_id, app.ids_in_ranges(args.ids)) if task]
+                elif args.where:
+                    targets = app.tasks.filtered(args.where)
+                else:
+                    parser.error("--set-priority needs --ids or --where")
+                changed = app.set_priority(targets, args.set_priority)
+                print(f"🎯 {changed} task(s) set to {args.set_priority} priority!")
+        return True
+    
+    # Handle command line operations
+    if args.migrate:
+        count = app.migrate_from_json(args.migrate)
+        if count is not None:
+            print(f"✅ Migrated {count} task(s) from '{args.migrate}' to '{args.file}'!")
+        return True
+    
+    if args.search:
+        app.search_tasks(args.search, args.format)
+        app.save_search_index()
+        return True
+    
+    return False
+
+
+def parse_quick_add(argv: List[str]) -> Optional[Dict]:
+    """The options of a plain --add command, or None when argparse must parse argv
+    
+    Building the full parser costs more than appending the task, so one-shot
+    adds only recognise --add, --file, --backend and --no-daemon.
+    """
+    options = {'add': None, 'file': 'tasks.json', 'backend': None, 'no_daemon': False}
+    names = {'--add': 'add', '-a': 'add', '--file': 'file', '-f': 'file', '--backend': 'backend'}
+    position = 0
+    while position < len(argv):
+        arg = argv[position]
+        if arg == '--no-daemon':
+            options['no_daemon'] = True
+        elif arg in names and position + 1 < len(argv) and not argv[position + 1].startswith('-'):
+            position += 1
+            options[names[arg]] = argv[position]
+        else:
+            return None
+        position += 1
+    if os.environ.get('TODO_TIMINGS', '') not in ('', '0') or os.environ.get('TODO_PROFILE'):
+        # Measured runs take the instrumented path
+        return None
+    if options['add'] is None or options['backend'] not in (None, 'json', 'sqlite', 'binary'):
+        return None
+    if options['backend'] == 'sqlite' or (options['backend'] is None and options['file'].lower().endswith(SQLITE_EXTENSIONS)):
+        # SQLite files take the full path, which reports a broken database
+        return None
+    return options
+
+
+def run_in_daemon(socket_path: str):
+    """Exit with a running daemon's answer if it handled this command"""
+    response = call_daemon(socket_path, sys.argv[1:])
+    if response is not None and response['handled']:
+        sys.stdout.write(response['output'])
+        sys.exit(response['status'])
+
+
+def main():
+    """Main function with command line argument support"""
+    quick_add = parse_quick_add(sys.argv[1:])
+    if quick_add is not None:
+        if not quick_add['no_daemon']:
+            run_in_daemon(daemon_socket_path(quick_add['file']))
+        TodoApp(quick_add['file'], quick_add['backend'], autoload=False).quick_add(quick_add['add'])
+        return
+    
+    parser = build_parser()
+    args = parser.parse_args()
+    workspace = None
+    if args.workspace:
+        try:
+            workspace = Workspace(args.workspace)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"cannot read workspace: {e}")
+        if args.use is not None:
+            if args.use not in workspace.lists:
+                parser.error(f"no list named '{args.use}' in the workspace")
+            # For this run only; --switch changes the saved active list
+            workspace.active = args.use
+        args.file = workspace.path()
+    elif args.use or args.switch or args.lists or args.all_lists:
+        parser.error("--use, --switch, --lists and --all-lists need --workspace")
+    socket_path = daemon_socket_path(args.file)
+    show_timings = args.timings or os.environ.get('TODO_TIMINGS', '') not in ('', '0')
+    profile_file = args.profile or os.environ.get('TODO_PROFILE') or None
+    
+    with instrumentation(show_timings, profile_file):
+        if args.serve:
+            app = TodoApp(os.path.abspath(args.file), args.backend, autoload=False)
+            app.save_index = args.save_index
+            serve(app, parser, socket_path)
+            return
+        
+        if workspace is not None and run_workspace_command(workspace, args, parser):
+            return
+        
+        # Commands go to a running daemon; binary stdout exports and measured runs stay local
+        if not args.no_daemon and args.export != '-' and not (show_timings or profile_file):
+            run_in_daemon(socket_path)
+        
+        app = TodoApp(args.file, args.backend, autoload=False)
+        app.workspace = workspace
+        try:
+            if run_command(app, args, parser):
+                return
+        except BrokenPipeError:
+            # The reader (e.g. head) has gone; keep the interpreter from complaining at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        
+        # Run interactive mode; run() only returns when the menu switches lists
+        app.run()
+        while app.switch_to is not None:
+            workspace.switch(app.switch_to)
+            app = workspace.open()
+            app.save_index = args.save_index
+            app.load_tasks()
+            app.run()